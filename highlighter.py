@@ -43,12 +43,233 @@ License:
 import sys
 import os
 import copy
+import threading
+from array import array
 
 #Qt objects
-from PyQt5.QtCore import Qt, QRegularExpression, QRegularExpressionMatch
-from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QFont
+from PyQt5.QtCore import Qt, QRegularExpression, QRegularExpressionMatch, QThreadPool, QTimer
+from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QTextCursor, QFont
 #from PyQt5.QtWidgets import *
 
+#Quark specific
+import settings as quarkSettings
+from quarkcache import LRUCache
+from quarkrenderworker import QuarkRenderWorker, RenderTask, RenderTaskSignals
+
+
+
+#~tokenizer~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# kinds of tokens, each highlighted with its own format
+blockToken, itemToken, spanToken = range(3)
+
+
+class MarkdownTokenizer(object):
+    """Splits a line/block of a note into the tokens to highlight, using the highlighting rules (see
+'Highlighter').
+
+Tokens are '(start, length, kind)' tuples, applied in order (a token takes precedence over the tokens before
+it).  Multi-line spans (block rules) are found first, then single items and single-line spans.  These are
+found as if each rule searched the line on its own (a match starting inside the previous match of the same
+rule, or right after it, is skipped), which gives the same highlighting as applying the rules one by one.
+Items are returned before spans, which take precedence.
+
+To search each line with fewer expressions, the rules anchored to the start of the line (which match once
+at most) are matched together, by a single expression capturing the match of each rule in a group of its
+own.  The other rules are only searched from the first place where one of them matches, found by a single
+expression made of all of them, so lines without such items or spans are not searched once per rule.
+
+Each tokenizer compiles its own copy of the rules, so tokenizers can be used in different threads (one
+tokenizer must only be used by one thread at a time)."""
+
+    def __init__(self, blockRules, itemRules, spanRules):
+        #rules that can span multiple lines, the block-state of a line inside a multi-line span is the index
+        #of its rule plus one ('None' for invalid rules, which are never matched)
+        self.blockRules = []
+        for ruleName, rule in blockRules.items():
+            if rule[0].isValid() and rule[1].isValid():
+                self.blockRules.append( (QRegularExpression(rule[0].pattern()), QRegularExpression(rule[1].pattern())) )
+            else:
+                print(ruleName + ": rule is not valid.")
+                self.blockRules.append(None)
+
+        #single items and single-line spans: the rules anchored to the start of the line are matched by an
+        #expression which captures the match of each one in its own group (they all match where it matches),
+        #and the other rules are searched from where the expression made of all the rules first matches
+        self.inlineRules = []   #'(rule, token kind)' of each rule not anchored to the start of the line
+        self.anchoredRules = [] #'(group number, token kind)' of each rule anchored to the start of the line
+        anchoredPatterns = []
+        patterns = []
+        groupCount = 0
+        for kind, rules in ((itemToken, itemRules), (spanToken, spanRules)):
+            for ruleName, rule in rules.items():
+                if not rule.isValid():
+                    print(ruleName + ": rule is not valid.")
+                elif rule.pattern().startswith("^"):
+                    self.anchoredRules.append( (groupCount + 1, kind) )
+                    anchoredPatterns.append( "(?=({})|)".format(rule.pattern()) )
+                    groupCount += 1 + rule.captureCount()   #the groups of the rule follow its own group
+                else:
+                    self.inlineRules.append( (QRegularExpression(rule.pattern()), kind) )
+                    self.inlineRules[-1][0].optimize()
+                if rule.isValid():
+                    patterns.append( "(?:{})".format(rule.pattern()) )
+        self.anchoredRule = QRegularExpression( "".join(anchoredPatterns) )
+        self.anchoredRule.optimize()
+        self.inlineRule = QRegularExpression( "|".join(patterns) or "(?!)" )
+        self.inlineRule.optimize()
+
+
+    def tokenize(self, text, previousState):
+        """Returns the tokens of the line/block 'text' and its block-state, given the block-state of the
+previous line/block ('None' if the block-state of the line should be left unchanged)."""
+
+        tokens = []
+        state = None
+        offset = 0      #offset from which to start search for rule matches in the text
+
+        #######################################################################
+        ### Multi-line span rules are handled by asigning a 'block-state' to ##
+        ### the current line/block of text being highlighted.  On the next   ##
+        ### call to this function, the state of the previous line/block is   ##
+        ### checked to see if the new current line is part of a multi-line   ##
+        ### span.  If the end expression for this rule is matched, then the  ##
+        ### function will highlight the line up to the end of the expression ##
+        ### and continue highlighting the rest of the line normally.  Else,  ##
+        ### it will highlight the whole line and assign the same block-state ##
+        ### to it.                                                           ##
+        #######################################################################
+
+        #highlight text if inside a multi-line span
+        if previousState > 0 and previousState <= len(self.blockRules):
+            rule = self.blockRules[previousState - 1]
+            ruleMatch = rule[1].match(text)
+            if not ruleMatch.hasMatch():                            #if the end expressions for the rule is not found
+                return [(0, len(text), blockToken)], previousState      #continue inside the current multi-line span (block-state)
+            state = 0                                               #else, set the normal block-state,
+            tokens.append( (0, ruleMatch.capturedEnd(), blockToken) )   #highlight to the end of the expression match
+            offset = ruleMatch.capturedLength()                         #and highlight normally from the end of the expression match
+
+        #match and highlight start of a multi-line span
+        for i, rule in enumerate(self.blockRules):
+            if rule is None:
+                continue
+            ruleMatch = rule[0].match(text, offset)
+            if not ruleMatch.hasMatch():
+                continue
+            endMatch = rule[1].match(text, offset + ruleMatch.capturedLength())
+            start = ruleMatch.capturedStart()
+            if endMatch.hasMatch():                                 #if the end expression is matched, highlight to the end of the match
+                tokens.append( (start, endMatch.capturedEnd() - start, blockToken) )
+                offset = endMatch.capturedEnd()
+            else:                                                   #else, highlight full line and set the block-state of the rule
+                tokens.append( (start, len(text) - start, blockToken) )
+                return tokens, i + 1
+
+        #highlight single items and single-line spans, starting with the ones at the start of the line (the
+        #spans among them are added last, so they still take precedence over items)
+        match = self.inlineRule.match(text, offset)
+        if not match.hasMatch():
+            return tokens, state
+        anchoredSpans = []
+        if match.capturedStart() == 0 and self.anchoredRules:   #the anchored rules can only match at the start
+            match = self.anchoredRule.match(text)
+            for group, kind in self.anchoredRules:
+                length = match.capturedLength(group)
+                if length > 0:
+                    (anchoredSpans if kind == spanToken else tokens).append( (0, length, kind) )
+        else:
+            offset = match.capturedStart()                  #no rule matches before the first match of any rule
+        for rule, kind in self.inlineRules:
+            match = rule.match(text, offset)
+            while match.hasMatch():
+                tokens.append( (match.capturedStart(), match.capturedLength(), kind) )
+                match = rule.match(text, match.capturedEnd() + 1)
+
+        return tokens + anchoredSpans, state
+
+
+
+#~spell checker~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class SpellChecker(object):
+    """Checks the spelling of words with a dictionary, remembering the result for the most recently checked
+words (the same words are checked again every time a line is highlighted).
+
+A spell checker is made for one dictionary: a new one is made when the dictionary changes.  Words added to
+or removed from the dictionary must go through 'add()' and 'remove()', which forget the results they change.
+The dictionary is only used, and results are only remembered or forgotten, with a lock held, so a spell
+checker can be used from several threads (a result looked up before a word is added or removed is never
+remembered after the word was forgotten)."""
+
+    def __init__(self, dictionary, cacheSize):
+        self.dictionary = dictionary
+        self.cache = LRUCache(cacheSize)   # whether each word is spelled correctly
+        self._lock = threading.Lock()
+
+
+    def check(self, word):
+        """Returns True if 'word' is spelled correctly."""
+
+        correct = self.cache.get(word)
+        if correct is None:
+            correct = self.lookUp(word)
+        return correct
+
+
+    def lookUp(self, word):
+        """Returns True if 'word' is spelled correctly, looking it up in the dictionary (and remembering the
+result) even if it was checked recently."""
+
+        with self._lock:
+            correct = self.dictionary.check(word)
+            self.cache.put(word, correct)
+        return correct
+
+
+    def cached(self, word):
+        """Returns whether 'word' is spelled correctly if it was checked recently, 'None' otherwise."""
+
+        return self.cache.get(word)
+
+
+    def suggest(self, word):
+        """Returns the suggested corrections of 'word'."""
+
+        with self._lock:
+            return self.dictionary.suggest(word)
+
+
+    def add(self, word):
+        """Adds 'word' to the dictionary."""
+
+        with self._lock:
+            self.dictionary.add(word)
+        self.forget(word)
+
+
+    def remove(self, word):
+        """Removes 'word' from the dictionary."""
+
+        with self._lock:
+            self.dictionary.remove(word)
+        self.forget(word)
+
+
+    def forget(self, word):
+        """Forgets the results for 'word', including its other capitalizations (which the dictionary accepts
+or rejects along with it)."""
+
+        with self._lock:
+            for variant in set( (word, word.lower(), word.upper(), word.capitalize()) ):
+                self.cache.remove(variant)
+
+
+    def stats(self):
+        """Returns the statistics of the results cache (see 'LRUCache.stats()')."""
+
+        return self.cache.stats()
+
 
 
 #~note editor~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -65,6 +286,8 @@ is highlighted using the 'setFormat(start, count, format)' method."""
         super(Highlighter, self).__init__(parentDocument)# the language dictionary to be used
 
         self.dictionary = None # declare dictionary object
+        self.spellChecker = None    # checks words with the dictionary (the dictionary is also used in a worker thread)
+        self.wordFinder = QRegularExpression("[A-Za-z]+")
 
         ########################################################################
         ### Rules are stored in dictionaries in order for each rule to have a ##
@@ -95,118 +318,285 @@ is highlighted using the 'setFormat(start, count, format)' method."""
             "math": QRegularExpression("\\$[^\\n\\$]+\\$")
         }
 
+        #the rules are compiled into a tokenizer, which finds what to highlight in each line/block
+        self.tokenizer = MarkdownTokenizer(self.blockRules, self.itemRules, self.spanRules)
+
+        #formats used to highlight each kind of token
+        blockFormat = QTextCharFormat()
+        blockFormat.setForeground(Qt.darkRed)
+        itemFormat = QTextCharFormat()
+        itemFormat.setFontWeight(QFont.Black)   #QFont.Black is heavier that QFont.Bold
+        itemFormat.setForeground(Qt.blue)
+        spanFormat = QTextCharFormat()
+        spanFormat.setFontWeight(QFont.Normal)
+        spanFormat.setForeground(Qt.darkMagenta)
+        self.formats = {blockToken: blockFormat, itemToken: itemFormat, spanToken: spanFormat}
+
+        #big notes are tokenized in a worker thread when opened, with their own tokenizer and word finder
+        self.backgroundTokenizer = MarkdownTokenizer(self.blockRules, self.itemRules, self.spanRules)
+        self.backgroundWordFinder = QRegularExpression("[A-Za-z]+")
+        self.tokenizeWorker = QuarkRenderWorker(self.tokenizeText, self)
+        self.tokenizeWorker.rendered.connect(self.applyBackgroundTokens)
+        self._suspended = False     #whether highlighting waits for the note being tokenized in the background
+        self._loading = False       #whether the note being tokenized in the background is being put in the document
+        self._tokenizeRevision = 0  #incremented every time a note starts being tokenized in the background
+        self._precomputed = None    #tokens computed in the background by line and block-state, while they are being applied
+
+        #words which were not checked recently are checked in a worker thread, after which the blocks where
+        #they are misspelled are highlighted again
+        self.spellCheckPool = QThreadPool(self)
+        self.spellCheckPool.setMaxThreadCount(1)
+        self.spellCheckSignals = RenderTaskSignals(self)
+        self.spellCheckSignals.finished.connect(self.wordsChecked)
+        self.spellCheckTimer = QTimer(self)     #the words found while highlighting are sent to be checked together
+        self.spellCheckTimer.setSingleShot(True)
+        self.spellCheckTimer.setInterval(0)
+        self.spellCheckTimer.timeout.connect(self.startSpellCheck)
+        self._spellCheckerGeneration = 0    #incremented when the dictionary changes, so older results are discarded
+        self._uncheckedWords = []           #words waiting to be sent to the worker thread
+        self._waitingBlocks = {}            #cursors following the blocks where each word being checked was found, by word
+        self._blockCursors = {}             #cursors of the blocks where the words waiting to be sent were found, by block number
+        self._checkedWords = None           #whether each word just checked is spelled correctly, while their blocks are highlighted again
+
 
     def setDictionary(self, dict) :
+        """Spell checks the note with the dictionary 'dict' ('None' to disable spell checking), highlighting
+it again.  If the note is being tokenized in the background, it is tokenized again with the new dictionary
+and highlighted once the tokens are ready, rather than right away."""
+
         self.dictionary = dict
+        self.spellChecker = SpellChecker(dict, int(quarkSettings.spelling_cache_size)) if dict else None
+        self._spellCheckerGeneration += 1
+        self._uncheckedWords = []
+        self._waitingBlocks = {}
+        self._blockCursors = {}
+        self.spellCheckPool.clear()
+        if self._suspended:     #the note being tokenized in the background must be spell checked again
+            self.highlightInBackground( self.document().toPlainText() )
+            self.noteLoaded()
+        else:
+            self.rehighlight()
 
 
     def getDictionary(self):
         return self.dictionary
 
 
+    def getSpellChecker(self):
+        return self.spellChecker
+
+
+    def findMisspellings(self, text, spellChecker, wordFinder):
+        """Returns the start and the length of every misspelled word of 'text', as a flat array."""
+
+        misspellings = array("i")
+        wordIterator = wordFinder.globalMatch(text)
+        while wordIterator.hasNext():
+            match = wordIterator.next()
+            if not spellChecker.check(match.captured()):
+                misspellings.extend( (match.capturedStart(), match.capturedLength()) )
+        return misspellings
+
+
+    def markMisspellings(self, misspellings):
+        """Underlines the misspelled words (as returned by 'findMisspellings()') of the current block."""
+
+        for i in range(0, len(misspellings), 2):
+            # update the word's current format
+            spellingErrorformat = self.format(misspellings[i])
+            spellingErrorformat.setUnderlineColor(Qt.red)
+            spellingErrorformat.setUnderlineStyle(QTextCharFormat.SpellCheckUnderline)
+
+            # set the new format
+            self.setFormat(misspellings[i], misspellings[i + 1], spellingErrorformat)
+
+
     def checkSpelling(self, text):
-        if not self.dictionary:
+        """Underlines the misspelled words of the current block.  Words which were not checked recently are
+sent to be checked in the background; the block is highlighted again if any of them is misspelled."""
+
+        if not self.spellChecker:
             return
 
-        wordFinder = QRegularExpression("[A-Za-z]+");
-        wordIterator = wordFinder.globalMatch(text)
+        misspellings = array("i")
+        wordIterator = self.wordFinder.globalMatch(text)
         while wordIterator.hasNext():
             match = wordIterator.next()
-            if not self.dictionary.check(match.captured()):
-                # update the word's current format
-                spellingErrorformat = self.format(match.capturedStart())
-                spellingErrorformat.setUnderlineColor(Qt.red)
-                spellingErrorformat.setUnderlineStyle(QTextCharFormat.SpellCheckUnderline)
+            word = match.captured()
+            if self._checkedWords is not None:     #the block is highlighted again after words were checked
+                correct = self._checkedWords.get(word)
+                if correct is None:     #a word forgotten since is checked right away, so that this does not go on forever
+                    correct = self.spellChecker.check(word)
+            else:
+                correct = self.spellChecker.cached(word)
+                if correct is None:
+                    self.queueSpellCheck(word, self.currentBlock())
+                    continue
+            if not correct:
+                misspellings.extend( (match.capturedStart(), match.capturedLength()) )
+        self.markMisspellings(misspellings)
+
+
+    def queueSpellCheck(self, word, block):
+        """Sends 'word', found in 'block', to be checked in the worker thread."""
+
+        cursor = self._blockCursors.get( block.blockNumber() )
+        if cursor is None or cursor.block() != block:   #the cursor follows the block if lines are inserted or removed before it
+            cursor = self._blockCursors[block.blockNumber()] = QTextCursor(block)
+        cursors = self._waitingBlocks.get(word)
+        if cursors is None:         #the word is not already being checked
+            cursors = self._waitingBlocks[word] = []
+            self._uncheckedWords.append(word)
+            self.spellCheckTimer.start()
+        if cursor not in cursors:
+            cursors.append(cursor)
+
+
+    def startSpellCheck(self):
+        """Starts checking the words found since the last time in the worker thread."""
+
+        words, self._uncheckedWords = self._uncheckedWords, []
+        self._blockCursors = {}
+        if words:
+            self.spellCheckPool.start( RenderTask(self.checkWords, words, self._spellCheckerGeneration,
+                                                  self.spellCheckSignals, (self.spellChecker,)) )
+
+
+    def checkWords(self, words, spellChecker):
+        """Checks the spelling of 'words' (called in the worker thread).  Returns the words and the set of
+the misspelled ones."""
+
+        return words, set( word for word in words if not spellChecker.lookUp(word) )
+
+
+    def wordsChecked(self, generation, result):
+        """Slot called when words were checked in the worker thread.  Highlights again the blocks which
+contain the misspelled ones."""
+
+        if generation != self._spellCheckerGeneration:  #the dictionary changed in the meantime
+            return
 
-                # set the new format
-                self.setFormat(match.capturedStart(), match.capturedLength(), spellingErrorformat)
+        words, misspelled = result
+        blocks = {}
+        for word in words:
+            cursors = self._waitingBlocks.pop(word, ())
+            if word in misspelled:
+                for cursor in cursors:
+                    blocks[cursor.blockNumber()] = cursor.block()
+
+        #the blocks are highlighted with the results of the words just checked, even if the spell checker
+        #forgot some of them already (so the words are not sent to be checked again)
+        self._checkedWords = dict( (word, word not in misspelled) for word in words )
+        try:
+            for number in sorted(blocks):
+                self.rehighlightBlock(blocks[number])
+        finally:
+            self._checkedWords = None
 
 
     def highlighMarkdown(self, text):
         """Finds and highlights text using regular expressions.  Is called on each
 line/block of the document every time the text changes."""
 
-        textFormat = QTextCharFormat()  #the format/highlighting to apply to text is stored here
-        defaultOffset = 0               #stores an offset from which to start search for rule matches in the text
+        tokens, state = self.tokenizer.tokenize(text, self.previousBlockState())
+        for start, length, kind in tokens:
+            self.setFormat(start, length, self.formats[kind])
+        if state is not None:
+            self.setCurrentBlockState(state)
 
-        #######################################################################
-        ### Multi-line span rules are handled by asigning a 'block-state' to ##
-        ### the current line/block of text being highlighted.  On the next   ##
-        ### call to this function, the state of the previous line/block is   ##
-        ### checked to see if the new current line is part of a multi-line   ##
-        ### span.  If the end expression for this rule is matched, then the  ##
-        ### function will highlight the line up to the end of the expression ##
-        ### and continue highlighting the rest of the line normally.  Else,  ##
-        ### it will highlight the whole line and assign the same block-state ##
-        ### to it.                                                           ##
-        #######################################################################
 
-        #highlight text if inside a multi-line span
-        textFormat.setForeground(Qt.darkRed)    #assign style for multi-line spans
-        if self.previousBlockState() > 0:       #if inside a multi-line span
-            rule = list(self.blockRules.values())[self.previousBlockState() - 1]#get the rule corresponding to the block-state
-            ruleMatch = rule[1].match(text)
-            if not ruleMatch.hasMatch():                                        #if the end expressions for the rule is not found
-                self.setCurrentBlockState( self.previousBlockState() )              #continue inside the current multi-line span (block-state)
-                self.setFormat(0, len(text), textFormat)                            #(no need to subtract one from the length as 'text' includes an extra '\n' ?)
-                return                                                              #no need to highlight anything else so return
-            else:                                                               #else
-                self.setCurrentBlockState(0)                                        #set the normal block-state
-                self.setFormat(0, ruleMatch.capturedEnd(), textFormat)              #apply highlighting to the end of the expression match
-                defaultOffset = ruleMatch.capturedLength()                          #highlight normally from the end of the expression match
+    def highlightInBackground(self, text):
+        """Tokenizes 'text', which is about to become the content of the document, in a worker thread.  Until
+the tokens are ready, the blocks of 'text' are not highlighted (until 'noteLoaded()' is called, blocks are
+assumed to come from 'text'); the tokens are then applied to every block which was not edited in the
+meantime (other blocks are highlighted as usual)."""
 
-        #match and highlight start of a multi-line span
-        counter = 1 #used to keep track of which rule is being checked
-        for ruleName, rule in self.blockRules.items():          #for every rule
-            if (not rule[0].isValid() ) or (not rule[1].isValid() ):#if the rule is not valid, print an error message and continue
-                print(ruleName + ": rule is not valid.")
-                continue
-            ruleMatch = rule[0].match(text, defaultOffset)          #match the rule
-            if not ruleMatch.hasMatch():                            #if the start expression is not matched, move on to the next rule
-                counter += 1
-                continue
-            endMatch = rule[1].match(text, defaultOffset + ruleMatch.capturedLength() )
-            start = ruleMatch.capturedStart()
-            if endMatch.hasMatch():                                 #if the end expression is matched,
-                self.setFormat(start, endMatch.capturedEnd() - start, textFormat)#highlight to the end of the match
-                defaultOffset = endMatch.capturedEnd()                  #
-                counter += 1                                            #
-                continue                                                #move on to the next rule
-            else:                                                   #else, highlight full line and set a block-state using 'counter'
-                self.setCurrentBlockState(counter)
-                self.setFormat(start, len(text) - start, textFormat)
-                return
-
-        #highlight single items
-        textFormat.setFontWeight(QFont.Black)   #QFont.Black is heavier that QFont.Bold
-        textFormat.setForeground(Qt.blue)
-        for ruleName, rule in self.itemRules.items():
-            if not rule.isValid():
-                print(ruleName + ": rule is not valid.")
-                continue
-            ruleMatch = rule.match(text, defaultOffset)
-            while ruleMatch.hasMatch():         #match all occurrences of the rule in the text line/block
-                self.setFormat(ruleMatch.capturedStart(), ruleMatch.capturedLength(), textFormat)
-                ruleMatch = rule.match(text, ruleMatch.capturedEnd() + 1)
-
-        #highlight single-line spans
-        textFormat.setFontWeight(QFont.Normal)
-        textFormat.setForeground(Qt.darkMagenta)
-        for ruleName, rule in self.spanRules.items():
-            if not rule.isValid():
-                print(ruleName + ": rule is not valid.")
-                continue
-            ruleMatch = rule.match(text, defaultOffset)
-            while ruleMatch.hasMatch():
-                self.setFormat(ruleMatch.capturedStart(), ruleMatch.capturedLength(), textFormat)
-                ruleMatch = rule.match(text, ruleMatch.capturedEnd() + 1)
+        self._tokenizeRevision += 1
+        self._suspended = True
+        self._loading = True
+        self.tokenizeWorker.requestRender(text, self._tokenizeRevision, self.spellChecker)
+
+
+    def noteLoaded(self):
+        """Called once the text given to 'highlightInBackground()' is in the document.  Blocks edited from
+then on are highlighted right away, without waiting for the tokens computed in the background."""
+
+        self._loading = False
+
+
+    def cancelBackgroundHighlighting(self):
+        """Discards the tokens being computed in the background (if any) and resumes normal highlighting."""
+
+        if self._suspended:
+            self._tokenizeRevision += 1
+            self._suspended = False
+            self._loading = False
 
-        #%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-        #%% I have left the highlighting code "un-cleaned" because I %%
-        #%% plan on implementing some major changes in the future.   %%
-        #%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+
+    def shutdown(self):
+        """Waits for the background tokenization and spell check in progress (if any) to finish."""
+
+        self.tokenizeWorker.shutdown()
+        self.spellCheckPool.clear()
+        self.spellCheckPool.waitForDone()
+
+
+    def tokenizeText(self, text, spellChecker):
+        """Tokenizes every line of 'text' (called in a worker thread).  Returns a dictionary which maps each
+line and the block-state it was tokenized from to its resulting block-state, its tokens (as a flat array of
+start, length and kind) and its misspelled words (see 'findMisspellings()').  The tokens of a line only
+depend on these two, so they can be applied to any block with the same text and previous block-state."""
+
+        blocks = {}
+        previousState = -1      #the blocks of a new document have no block-state
+        for line in text.split("\n"):
+            block = blocks.get( (line, previousState) )
+            if block is None:
+                tokens, state = self.backgroundTokenizer.tokenize(line, previousState)
+                flatTokens = array("i")
+                for token in tokens:
+                    flatTokens.extend(token)
+                misspellings = self.findMisspellings(line, spellChecker, self.backgroundWordFinder) if spellChecker else array("i")
+                block = blocks[(line, previousState)] = (state, flatTokens, misspellings)
+            state = block[0]
+            previousState = -1 if state is None else state  #a block-state left unchanged stays the one of a new block
+        return blocks
+
+
+    def applyBackgroundTokens(self, revision, blocks):
+        """Slot called when the tokens computed in the background are ready.  Highlights the document with them."""
+
+        if revision != self._tokenizeRevision or not self._suspended:  #the note was replaced in the meantime
+            return
+        self._suspended = False
+        self._loading = False
+        self._precomputed = blocks
+        self.rehighlight()
+        self._precomputed = None
+
+
+    def applyPrecomputed(self, text):
+        """Highlights the current block with the tokens computed in the background for the same text and
+previous block-state, wherever the block is in the note (so blocks inserted or removed in the meantime do not
+affect the other blocks).  Returns True if there were such tokens."""
+
+        block = self._precomputed.get( (text, self.previousBlockState()) )
+        if block is None:           #the block was edited, or starts in a different block-state
+            return False
+        state, tokens, misspellings = block
+
+        for i in range(0, len(tokens), 3):
+            self.setFormat(tokens[i], tokens[i + 1], self.formats[tokens[i + 2]])
+        if state is not None:
+            self.setCurrentBlockState(state)
+        self.markMisspellings(misspellings)
+        return True
 
 
     def highlightBlock(self, text):
+        if self._loading:       #the note is being tokenized in the background
+            return
+        if self._precomputed is not None and self.applyPrecomputed(text):
+            return
         self.highlighMarkdown(text) # highlight Markdown syntax
         self.checkSpelling(text)    # highlight spelling errors
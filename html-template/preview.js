@@ -0,0 +1,413 @@
+/*
+Project: Quark Note Taker
+File: preview.js
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+
+Description:
+    Script loaded into the note preview "shell" page.  Quark loads the shell (document
+    header, stylesheets and MathJax) only once and then updates the content of the note
+    through the functions defined here, which are called from Python using
+    'evaluateJavaScript()'.
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License: MIT (see quark.py)
+*/
+
+var quark = (function () {
+    "use strict";
+
+    var content = document.getElementById("quark-content"),   // element holding the rendered note
+        options = {
+            mathCacheSize: 2000,    // maximum number of typeset expressions kept in the math cache
+            lazyMath: false,        // only typeset the math that is (nearly) visible right away
+            lazyMathMargin: 800,    // distance (in pixels) from the viewport at which math is typeset
+            lazyMathBatch: 20,      // number of expressions typeset at a time in the background
+            lazyMathIdleDelay: 200, // delay (in milliseconds) between background typesetting batches
+            trace: false            // tell Quark when MathJax is done typesetting (for its performance traces)
+        },
+        mathCache = {},             // typeset output of math expressions, by source and display mode
+        mathCacheKeys = [],         // keys of the math cache, oldest first
+        pendingMath = [],           // math wrappers waiting to be typeset (in lazy mode)
+        idleTimer = null,           // timer of the background typesetting pass
+        scrollTimer = null,         // timer used to throttle scroll events
+        layoutTimer = null,         // timer used to wait for the layout to settle after a change
+        anchors = null,             // source lines and offsets of the blocks (measured on demand, after layout)
+        syncedLine = null,          // source line the preview was last scrolled to by Quark
+        syncedOffset = null;        // scroll offset that resulted from it (its scroll event must not be reported)
+
+    // tell Quark that MathJax typeset (part of) the note, if it is recording a trace
+    function notifyTypeset() {
+        if (options.trace && window.quarkBridge) {
+            quarkBridge.mathTypeset();
+        }
+    }
+
+    // the blocks may have moved (the note changed, math was typeset, an image was loaded...): forget
+    // their offsets and, once the layout is done, keep the preview at the line it was synchronized to
+    function layoutChanged() {
+        anchors = null;
+        if (layoutTimer === null) {
+            layoutTimer = setTimeout(function () {
+                layoutTimer = null;
+                if (syncedLine !== null) {
+                    scrollToLine(syncedLine);
+                }
+            }, 0);
+        }
+    }
+
+    // the index of the blocks of the note: their first source line, number of lines and vertical extent
+    // in the page, in document order; it is only measured when needed, after the layout has changed
+    function getAnchors() {
+        var node,
+            rect;
+
+        if (anchors === null) {
+            anchors = {lines: [], counts: [], tops: [], bottoms: []};
+            for (node = content.firstElementChild; node; node = node.nextElementSibling) {
+                rect = node.getBoundingClientRect();
+                anchors.lines.push(parseInt(node.getAttribute("data-line"), 10) || 0);
+                anchors.counts.push(parseInt(node.getAttribute("data-lines"), 10) || 1);
+                anchors.tops.push(rect.top + window.pageYOffset);
+                anchors.bottoms.push(rect.bottom + window.pageYOffset);
+            }
+        }
+        return anchors;
+    }
+
+    // index of the last of the (sorted) 'values' which is not greater than 'value', or -1 if there is none
+    function lastNotAfter(values, value) {
+        var low = 0,
+            high = values.length,
+            middle;
+
+        while (low < high) {
+            middle = Math.floor((low + high) / 2);
+            if (values[middle] <= value) {
+                low = middle + 1;
+            } else {
+                high = middle;
+            }
+        }
+        return low - 1;
+    }
+
+    // vertical offset in the page of the (fractional) source line 'line'
+    function offsetOfLine(line) {
+        var index = getAnchors(),
+            i = lastNotAfter(index.lines, line),
+            fraction;
+
+        if (i < 0) {
+            return 0;
+        }
+        fraction = Math.min(1, (line - index.lines[i]) / index.counts[i]);
+        return index.tops[i] + fraction * (index.bottoms[i] - index.tops[i]);
+    }
+
+    // (fractional) source line shown at the vertical offset 'offset' of the page
+    function lineAtOffset(offset) {
+        var index = getAnchors(),
+            i = lastNotAfter(index.tops, offset),
+            height;
+
+        if (i < 0) {
+            return 0;
+        }
+        height = index.bottoms[i] - index.tops[i];
+        return index.lines[i] + (height > 0 ? Math.min(1, (offset - index.tops[i]) / height) : 0) * index.counts[i];
+    }
+
+    // scroll the preview so the source line 'line' is at the top
+    function scrollToLine(line) {
+        syncedLine = line;
+        window.scrollTo(window.pageXOffset, Math.round(offsetOfLine(line)));
+        syncedOffset = window.pageYOffset;
+    }
+
+    // key of the math cache for a math '<script>' element (its type includes the display mode)
+    function mathKey(script) {
+        return script.type + "\n" + script.text;
+    }
+
+    // store the typeset output of the math inside 'element' in the math cache
+    function cacheMath(element) {
+        var wrappers = element.querySelectorAll("span.quark-math"),
+            wrapper,
+            script,
+            key,
+            output,
+            node,
+            i;
+
+        for (i = 0; i < wrappers.length; i += 1) {
+            wrapper = wrappers[i];
+            script = wrapper.querySelector("script");
+            if (!script) {
+                continue;   // this expression was taken from the cache
+            }
+            key = mathKey(script);
+            if (Object.prototype.hasOwnProperty.call(mathCache, key)) {
+                continue;
+            }
+
+            // keep a copy of what MathJax generated (without ids, which must stay unique)
+            output = [];
+            for (node = wrapper.firstChild; node; node = node.nextSibling) {
+                if (node !== script && !(node.className && /MathJax_Preview/.test(node.className))) {
+                    output.push(node.cloneNode(true));
+                }
+            }
+            output.forEach(function (n) {
+                var descendants,
+                    j;
+
+                if (n.nodeType !== 1) {
+                    return;     // text and comment nodes have no attributes
+                }
+                n.removeAttribute("id");
+                descendants = n.querySelectorAll("[id]");
+                for (j = 0; j < descendants.length; j += 1) {
+                    descendants[j].removeAttribute("id");
+                }
+            });
+
+            mathCache[key] = output;
+            mathCacheKeys.push(key);
+            while (mathCacheKeys.length > options.mathCacheSize) {
+                delete mathCache[mathCacheKeys.shift()];
+            }
+        }
+    }
+
+    // replace the math inside 'element' that is in the math cache by its typeset output;
+    // returns true if some of the math still has to be typeset by MathJax
+    function reuseMath(element) {
+        var scripts = element.querySelectorAll("span.quark-math > script"),
+            needsTypeset = false,
+            cached,
+            i,
+            j;
+
+        for (i = 0; i < scripts.length; i += 1) {
+            cached = mathCache[mathKey(scripts[i])];
+            if (cached) {
+                for (j = 0; j < cached.length; j += 1) {
+                    scripts[i].parentNode.insertBefore(cached[j].cloneNode(true), scripts[i]);
+                }
+                scripts[i].parentNode.removeChild(scripts[i]);
+            } else {
+                needsTypeset = true;
+            }
+        }
+        return needsTypeset;
+    }
+
+    // whether 'element' is inside or close to the visible area of the preview
+    function isNearViewport(element) {
+        var rect = element.getBoundingClientRect();
+        return rect.bottom >= -options.lazyMathMargin && rect.top <= window.innerHeight + options.lazyMathMargin;
+    }
+
+    // show the TeX source of the math inside 'element' until it is typeset and queue it for typesetting
+    // (MathJax removes the 'MathJax_Preview' element in front of a script once it is typeset)
+    function deferMath(element) {
+        var scripts = element.querySelectorAll("span.quark-math > script"),
+            placeholder,
+            i;
+
+        for (i = 0; i < scripts.length; i += 1) {
+            placeholder = document.createElement("span");
+            placeholder.className = "MathJax_Preview";
+            placeholder.appendChild(document.createTextNode(scripts[i].text));
+            scripts[i].parentNode.insertBefore(placeholder, scripts[i]);
+            pendingMath.push(scripts[i].parentNode);
+        }
+    }
+
+    // typeset up to 'limit' of the pending math wrappers (only the ones near the viewport if
+    // 'onlyVisible' is set); returns the number of wrappers sent to MathJax
+    function typesetPending(onlyVisible, limit) {
+        var remaining = [],
+            count = 0;
+
+        pendingMath.forEach(function (wrapper) {
+            if (!content.contains(wrapper) || !wrapper.querySelector("script")) {
+                return;     // the block was removed or replaced since
+            }
+            if (count < limit && (!onlyVisible || isNearViewport(wrapper))) {
+                MathJax.Hub.Queue(["Typeset", MathJax.Hub, wrapper], [cacheMath, wrapper], layoutChanged, notifyTypeset);
+                count += 1;
+            } else {
+                remaining.push(wrapper);
+            }
+        });
+
+        pendingMath = remaining;
+        return count;
+    }
+
+    // typeset the remaining math in the background, a batch at a time, once MathJax is idle
+    function scheduleIdlePass() {
+        clearTimeout(idleTimer);
+        if (pendingMath.length === 0) {
+            return;
+        }
+        idleTimer = setTimeout(function () {
+            typesetPending(true, Infinity);
+            if (typesetPending(false, options.lazyMathBatch) > 0) {
+                MathJax.Hub.Queue(scheduleIdlePass);
+            } else {
+                scheduleIdlePass();
+            }
+        }, options.lazyMathIdleDelay);
+    }
+
+    // ask MathJax to typeset the math inside 'element' only, reusing the cached output when possible;
+    // in lazy mode, only the math near the viewport is typeset right away
+    function typeset(element) {
+        if (!(window.MathJax && MathJax.Hub) || !reuseMath(element)) {
+            return;
+        }
+        if (options.lazyMath) {
+            deferMath(element);
+            typesetPending(true, Infinity);
+            scheduleIdlePass();
+        } else {
+            MathJax.Hub.Queue(["Typeset", MathJax.Hub, element], [cacheMath, element], layoutChanged, notifyTypeset);
+        }
+    }
+
+    // tell Quark about the first placeholder block in view (if any) so it gets rendered
+    function requestVisiblePlaceholder() {
+        var placeholders = content.querySelectorAll("div.quark-placeholder"),
+            low = 0,
+            high = placeholders.length,
+            middle,
+            rect,
+            line;
+
+        if (!window.quarkBridge || placeholders.length === 0) {
+            return;
+        }
+
+        // placeholders are in document order, so find the first one which is not above the viewport
+        while (low < high) {
+            middle = Math.floor((low + high) / 2);
+            if (placeholders[middle].getBoundingClientRect().bottom < 0) {
+                low = middle + 1;
+            } else {
+                high = middle;
+            }
+        }
+        if (low < placeholders.length) {
+            rect = placeholders[low].getBoundingClientRect();
+            if (rect.top <= window.innerHeight) {
+                // a placeholder may stand for many blocks: ask for the line at the top of the viewport
+                line = parseInt(placeholders[low].getAttribute("data-line"), 10);
+                if (rect.top < 0 && rect.height > 0) {
+                    line += Math.floor(-rect.top / rect.height * (parseInt(placeholders[low].getAttribute("data-lines"), 10) || 1));
+                }
+                quarkBridge.showPlaceholder(line);
+            }
+        }
+    }
+
+    // typeset the pending math, render the placeholders that scroll into view and tell Quark which
+    // line is at the top of the preview, unless Quark scrolled it there itself (throttled)
+    window.addEventListener("scroll", function () {
+        if (scrollTimer === null) {
+            scrollTimer = setTimeout(function () {
+                scrollTimer = null;
+                if (pendingMath.length > 0 && window.MathJax && MathJax.Hub) {
+                    typesetPending(true, Infinity);
+                }
+                requestVisiblePlaceholder();
+                if (window.pageYOffset !== syncedOffset) {
+                    syncedLine = null;
+                    syncedOffset = null;
+                    if (window.quarkBridge) {
+                        quarkBridge.scrolledToLine(lineAtOffset(window.pageYOffset));
+                    }
+                }
+            }, 50);
+        }
+    });
+
+    // images change the layout when they are loaded ('load' does not bubble, so it is captured)
+    content.addEventListener("load", layoutChanged, true);
+    window.addEventListener("resize", layoutChanged);
+
+    // create the element of a block from its HTML (a single '<div data-qk="...">' element)
+    function makeBlock(html) {
+        var container = document.createElement("div");
+        container.innerHTML = html;
+        return container.firstElementChild;
+    }
+
+    return {
+        // set the options of the preview (see 'options' above)
+        setOptions: function (newOptions) {
+            var name;
+            for (name in newOptions) {
+                if (Object.prototype.hasOwnProperty.call(newOptions, name)) {
+                    options[name] = newOptions[name];
+                }
+            }
+        },
+
+        // replace the whole content of the note
+        setContent: function (html) {
+            content.innerHTML = html;
+            layoutChanged();
+            typeset(content);
+        },
+
+        // scroll the preview so the (fractional) source line 'line' is at the top
+        scrollToLine: scrollToLine,
+
+        // update the note: remove the blocks whose keys are in 'removed', insert the blocks of 'inserted',
+        // given in document order as '[previousKey, key, html]' (a 'null' previous key is the start of the
+        // note), and update the '[firstLine, lineCount]' of the blocks in 'moved', which maps keys to lines
+        patch: function (removed, inserted, moved) {
+            var nodes = {},     // blocks in the note, by key
+                newNodes = [],  // blocks created by this update
+                node,
+                key,
+                i;
+
+            for (node = content.firstElementChild; node; node = node.nextElementSibling) {
+                nodes[node.getAttribute("data-qk")] = node;
+            }
+
+            for (i = 0; i < removed.length; i += 1) {
+                node = nodes[removed[i]];
+                if (node) {
+                    content.removeChild(node);
+                    delete nodes[removed[i]];
+                }
+            }
+
+            for (i = 0; i < inserted.length; i += 1) {
+                node = makeBlock(inserted[i][2]);
+                content.insertBefore(node, inserted[i][0] === null ? content.firstElementChild : nodes[inserted[i][0]].nextElementSibling);
+                nodes[inserted[i][1]] = node;
+                newNodes.push(node);
+            }
+
+            for (key in moved) {
+                if (Object.prototype.hasOwnProperty.call(moved, key) && nodes[key]) {
+                    nodes[key].setAttribute("data-line", moved[key][0]);
+                    nodes[key].setAttribute("data-lines", moved[key][1]);
+                }
+            }
+
+            layoutChanged();
+
+            // typeset once the blocks are laid out, so lazy typesetting knows where they are
+            newNodes.forEach(typeset);
+        }
+    };
+}());
@@ -42,9 +42,7 @@ License:
 import sys
 import os
 import shutil
-
-#extra modules
-import misaka
+import time
 
 #Qt objects
 from PyQt5.QtCore import *
@@ -56,8 +54,17 @@ from PyQt5.QtWebKitWidgets import *
 #Quark specific
 import quarkExtra
 import settings as quarkSettings
-from quarkrenderer import QuarkRenderer
+from quarkblockrenderer import QuarkBlockRenderer
+from quarkprocessrenderer import QuarkProcessRenderer
 from noteeditor import NoteEditor
+from quarkpreview import QuarkPreview
+from quarkrenderworker import QuarkRenderWorker, FunctionTask
+from quarkupdatedelay import AdaptiveUpdateDelay
+from quarkdiskcache import QuarkDiskCache
+from quarkimagecache import QuarkImageCache
+from quarktrace import tracer
+from quarkmetrics import metrics
+from quarkprofiler import profiler
 from quarknotemanagermodel import QuarkNoteManagerModel
 from quarknotemodel import QuarkNoteModel
 from quarknotebookmodel import QuarkNotebookModel
@@ -75,10 +82,25 @@ class MainWindow(QMainWindow):
         #initialize private variables
 
         self._syncScroll = False    #variable to hold the state of synchronized scrolling (not synchronized)
+        self._noteRevision = 0      #revision of the note in the editor, incremented on every change
+
+        # create markdown parser (only the blocks of the note that changed are re-rendered)
+        if quarkSettings.process_pool_rendering:
+            self.htmlRenderer = QuarkProcessRenderer(int(quarkSettings.render_processes))
+        else:
+            self.htmlRenderer = QuarkBlockRenderer()
 
-        # create markdown parser
-        renderer = QuarkRenderer()
-        self.htmlRenderer = misaka.Markdown(renderer, extensions=misaka.EXT_FENCED_CODE | misaka.EXT_MATH | misaka.EXT_MATH_EXPLICIT | misaka.EXT_TABLES)
+        # the preview is rendered in a worker thread so typing is never blocked by a render
+        self.renderWorker = QuarkRenderWorker(self.renderPreviewBlocks, self)
+        self._displayedRevision = -1    #revision of the note displayed in the preview
+        self._displayedBlocks = []      #blocks displayed in the preview
+        self._renderedBlocks = []       #blocks displayed in the preview, before their images were replaced by downscaled copies
+
+        # rendered notes are stored on disk so their preview can be displayed as soon as they are opened
+        self.diskCache = None
+        self._storeNextPreview = False  #whether to store the next complete preview in the disk cache
+        if quarkSettings.render_cache:
+            self.diskCache = QuarkDiskCache(quarkSettings.render_cache_dir, int(quarkSettings.render_cache_size))
 
         #setup the main window menu
         self.mainToolBar = self.addToolBar("Main Toolbar")
@@ -129,6 +151,8 @@ class MainWindow(QMainWindow):
         self.menu["View"].addAction( self.action["Word Wrap"] )
         self.action["Line Wrap"] = self.actionGroup["wrap mode"].addAction("&Line Wrap")
         self.menu["View"].addAction( self.action["Line Wrap"] )
+        self.menu["View"].addSeparator()
+        self.action["Performance Metrics"] = self.menu["View"].addAction("Performance &Metrics")
 
         #create shorcuts for actions in 'View' menu
         self.action["Note Manager"].setShortcut( QKeySequence("Ctrl+M") )
@@ -146,12 +170,23 @@ class MainWindow(QMainWindow):
         self.action["No Wrap"].setCheckable(True)
         self.action["Word Wrap"].setCheckable(True)
         self.action["Line Wrap"].setCheckable(True)
+        self.action["Performance Metrics"].setCheckable(True)
 
         #create actions for 'Help' menu
         self.action["About Quark Note Taker"] = self.menu["Help"].addAction("&About Quark Note Taker")
         self.action["View GitHub Page"] = self.menu["Help"].addAction("View &GitHub Page")
         self.menu["Help"].addSeparator()
         self.action["About Qt"] = self.menu["Help"].addAction("About &Qt")
+        self.menu["Help"].addSeparator()
+        self.action["Record Performance Trace"] = self.menu["Help"].addAction("&Record Performance Trace")
+        self.action["Export Performance Trace"] = self.menu["Help"].addAction("E&xport Performance Trace")
+        self.action["Profile Quark"] = self.menu["Help"].addAction("&Profile Quark")
+
+        #set check state for actions in 'Help' menu
+        self.action["Record Performance Trace"].setCheckable(True)
+        self.action["Record Performance Trace"].setChecked(tracer.enabled)
+        self.action["Profile Quark"].setCheckable(True)
+        self.action["Profile Quark"].setChecked(profiler.isRunning())    #the profiler can be started from the command line
 
         #setup main window layout
         self.centralWidget = QSplitter(self)                #widget container to hold all others
@@ -189,8 +224,12 @@ class MainWindow(QMainWindow):
         self.menu["Dictionary"] = self.menuBar().addMenu(self.noteEditor.getDictionarySelector())
 
         #create and set the note previewer
-        self.notePreview = QWebView(self.noteArea)          #note preview widget
-        self.notePreview.page().setLinkDelegationPolicy(QWebPage.DelegateExternalLinks)
+        self.notePreview = QuarkPreview(self.htmlRenderer.renderer.docHeader, self.htmlRenderer.renderer.docFooter, self.noteArea)  #note preview widget
+        # local images are displayed in the preview as copies downscaled to its width
+        self.imageCache = None
+        if quarkSettings.image_cache:
+            self.imageCache = QuarkImageCache(quarkSettings.image_cache_dir, int(quarkSettings.image_cache_size),
+                                              os.path.dirname(self.notePreview.baseUrl.toLocalFile()), self)
         previewSizePolicy = QSizePolicy(QSizePolicy.Preferred, QSizePolicy.Preferred)
         previewSizePolicy.setHorizontalStretch(1)
         previewSizePolicy.setVerticalStretch(1)
@@ -213,11 +252,15 @@ class MainWindow(QMainWindow):
         self.action["View Editor/Preview Vertically"].toggled.connect(self.changeNoteDirectionOnAction)
         self.action["Synchronized Scrolling"].toggled.connect(self.setSyncScroll)
         self.actionGroup["wrap mode"].triggered.connect(self.setWrapModeOnAction)
+        self.action["Performance Metrics"].toggled.connect(self.setMetricsVisible)
 
         #connect signals in 'Help' menu to slots
         self.action["About Quark Note Taker"].triggered.connect(self.displayAboutQuark)
         self.action["View GitHub Page"].triggered.connect(self.openGithubPage)
         self.action["About Qt"].triggered.connect(self.displayAboutQt)
+        self.action["Record Performance Trace"].toggled.connect(self.setTracing)
+        self.action["Export Performance Trace"].triggered.connect(self.exportTraceAction)
+        self.action["Profile Quark"].toggled.connect(self.setProfiling)
 
         # setup timer that delays the editor view update when editing a note
         self.updateDelayTimer = QTimer(self)
@@ -226,17 +269,49 @@ class MainWindow(QMainWindow):
         self.updateDelayTimer.setInterval(updateDelay)
         self.updateDelayTimer.timeout.connect(self.updateSlot)
 
+        # the delay can also be adapted to how long it takes to render the note
+        self.updateDelay = AdaptiveUpdateDelay(updateDelay, int(quarkSettings.update_delay_min),
+                                               int(quarkSettings.update_delay_max), int(quarkSettings.update_max_staleness))
+        self._renderRequestTime = 0.0   #time at which the last render was requested
+        self._debounceStart = 0.0       #time (for the tracer) at which the preview update started to be delayed
+        self._firstUndisplayedEdit = None   #time of the oldest edit not yet shown in the preview (for the metrics)
+
+        # setup timer used to render the rest of a virtualized preview when idle
+        self._previewVirtualized = False    #whether the preview only renders the part of the note being viewed
+        self._previewCenter = None      #line around which a virtualized preview is rendered (None to follow the editor)
+        self.fillPreviewTimer = QTimer(self)
+        self.fillPreviewTimer.setSingleShot(True)
+        self.fillPreviewTimer.setInterval(100)
+        self.fillPreviewTimer.timeout.connect(self.fillPreview)
+
+        # setup timer used to throttle synchronized scrolling of the preview
+        self._syncingEditor = False     #whether the editor is being scrolled to follow the preview
+        self.syncScrollTimer = QTimer(self)
+        self.syncScrollTimer.setSingleShot(True)
+        self.syncScrollTimer.setInterval(30)
+        self.syncScrollTimer.timeout.connect(self.scrollPreviewToEditor)
+
         #connect signals from the note editor to slots
         #self.noteEditor.textChanged.connect(self.updatePreview)
         #self.noteEditor.textChanged.connect(self.updateSlot)
-        self.noteEditor.textChanged.connect(self.updateDelayTimer.start)
+        self.noteEditor.textChanged.connect(self.incrementNoteRevision)
+        self.noteEditor.textChanged.connect(self.scheduleUpdate)
         self.noteEditor.noteFileChanged.connect(self.changeTitle)
+        self.noteEditor.noteFileChanged.connect(self.showCachedPreview)
         self.noteEditor.verticalScrollBar().valueChanged.connect(self.syncPreviewScroll)
+        self.noteEditor.verticalScrollBar().valueChanged.connect(self.followEditorInPreview)
 
         #connect signals from the note previewer to slots
+        self.renderWorker.rendered.connect(self.displayPreview)
+        if self.imageCache is not None:
+            self.imageCache.imageReady.connect(self.fillPreviewTimer.start)  #show the downscaled images once ready
+        self.notePreview.bridge.placeholderVisible.connect(self.showPreviewLine)
+        self.notePreview.bridge.scrolled.connect(self.syncEditScroll)
         self.notePreview.page().linkClicked.connect(self.linkClickHandler)
-        self.notePreview.page().mainFrame().contentsSizeChanged.connect(self.syncPreviewScroll)
-            #this connection is made to prevent the previewer from scrolling to the top on every edit
+        if not self.notePreview.persistent:
+            self.notePreview.page().mainFrame().contentsSizeChanged.connect(self.syncPreviewScroll)
+                #this connection is made to prevent the previewer from scrolling to the top on every edit
+                #(a persistent preview keeps its position itself)
 
         #connect signals from the note manager to slots
         self.noteManager.doubleClicked.connect(self.openNoteFromManager)
@@ -248,6 +323,21 @@ class MainWindow(QMainWindow):
         self.managerNotebookAction["Remove Notebook"].triggered.connect(self.removeItemInManager)
         self.managerNotebookAction["Add a Note"].triggered.connect(self.addNoteToNotebook)
 
+        # setup the status bar widget showing the performance metrics, updated every second while visible
+        self.metricsLabel = QLabel(self)
+        self.statusBar().addPermanentWidget(self.metricsLabel)
+        self.metricsDisplayTimer = QTimer(self)
+        self.metricsDisplayTimer.setInterval(1000)
+        self.metricsDisplayTimer.timeout.connect(self.updateMetricsDisplay)
+        self.action["Performance Metrics"].setChecked(quarkSettings.metrics_status_bar)
+        self.setMetricsVisible(quarkSettings.metrics_status_bar)
+
+        # setup timer to periodically write the metrics to the metrics file
+        self.metricsFileTimer = QTimer(self)
+        self.metricsFileTimer.timeout.connect(self.writeMetrics)
+        if quarkSettings.metrics_file:
+            self.metricsFileTimer.start( int(quarkSettings.metrics_interval) )
+
         #last minute configs
         self.changeTitle("")        #set default window title
         self.loadSession()
@@ -265,6 +355,12 @@ class MainWindow(QMainWindow):
 
         self.saveFileAction()   #save the current note
         self.saveSession()      #save the user's session
+        self.renderWorker.shutdown()    #wait for the render in progress (if any) to finish
+        self.noteEditor.highlighter.shutdown()  #wait for the note being tokenized (if any)
+        if self.imageCache is not None:
+            self.imageCache.shutdown()  #wait for the image being downscaled (if any)
+        self.htmlRenderer.close()       #stop the render processes (if any)
+        self.writeMetrics()             #write the metrics recorded since the last time
 
         #call parent method
         super(MainWindow, self).closeEvent(event)
@@ -311,9 +407,80 @@ class MainWindow(QMainWindow):
 
 
     def updatePreview(self):
-        """Converts the Markdown note to HTML and loads it into the previewer."""
+        """Requests the Markdown note to be converted to HTML.  The conversion is done in a worker thread
+and the result is loaded into the previewer by 'displayPreview()'."""
+
+        self.updateDelay.updateStarted()
+        self.requestRender( bool(quarkSettings.deferred_highlighting) )
+
+
+    def requestRender(self, deferHighlighting=False):
+        """Sends a snapshot of the note to the render worker.  Very long notes are virtualized: only the
+blocks around the line being viewed are rendered, the others are shown as placeholders in the preview.
+If 'deferHighlighting' is True, long code blocks are first shown without highlighting (see 'fillPreview()')."""
+
+        self._renderRequestTime = time.monotonic()  #every render is timed, including the ones filling the preview
+        with tracer.span("toPlainText", category="preview"):
+            text = self.noteEditor.toPlainText()    #snapshot of the note
+        if self.imageCache is not None:
+            self.imageCache.setTargetWidth( self.notePreview.width() )
+        self._previewVirtualized = len(text) >= int(quarkSettings.virtual_preview_threshold)
+        if not self._previewVirtualized:
+            self.renderWorker.requestRender(text, self._noteRevision, None, None, deferHighlighting)
+            return
+
+        centerLine = self._previewCenter
+        if centerLine is None:                  #follow the part of the note shown in the editor
+            centerLine = self.noteEditor.cursorForPosition(QPoint(0, 0)).blockNumber()
+        halfWindow = int(quarkSettings.virtual_preview_window) // 2
+        window = (max(0, centerLine - halfWindow), centerLine + halfWindow)
+        self.renderWorker.requestRender(text, self._noteRevision, window, int(quarkSettings.virtual_preview_budget), deferHighlighting)
+
+
+    def renderPreviewBlocks(self, text, *args):
+        """Renders the note 'text' for the preview (see 'QuarkBlockRenderer.renderKeyedBlocks()' for the
+arguments).  Returns a '(renderedBlocks, displayedBlocks)' tuple, where the displayed blocks have their local
+images replaced by downscaled copies.  Called in the render worker thread."""
+
+        with tracer.span("render", chars=len(text)):
+            renderedBlocks = self.htmlRenderer.renderKeyedBlocks(text, *args)
+        displayedBlocks = renderedBlocks
+        if self.imageCache is not None:
+            with tracer.span("rewrite images"):
+                displayedBlocks = self.imageCache.rewriteBlocks(renderedBlocks)
+        return renderedBlocks, displayedBlocks
+
 
-        htmlDocument = self.htmlRenderer( self.noteEditor.toPlainText() )
+    def fillPreview(self):
+        """Renders the blocks of the preview which are still pending (more of a virtualized preview or code
+blocks whose highlighting was deferred), when idle."""
+
+        if self.notePreview.isVisible():
+            self.requestRender()
+
+
+    def showPreviewLine(self, line):
+        """Renders the part of a virtualized preview around 'line' (e.g. when it is scrolled into view)."""
+
+        self._previewCenter = line
+        self.fillPreviewTimer.start()
+
+
+    def followEditorInPreview(self):
+        """Makes a virtualized preview render the part of the note shown in the editor."""
+
+        if self._previewVirtualized:
+            self._previewCenter = None
+            self.fillPreviewTimer.start()
+
+
+    def displayPreview(self, revision, blocks):
+        """Loads a rendered note (see 'renderPreviewBlocks()') into the previewer, unless the note has changed
+since the render was requested."""
+
+        if revision != self._noteRevision:  #the result is stale, a newer render will follow
+            return
+        renderedBlocks, htmlBlocks = blocks
         #%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
         #%% Some debug code that outputs the HTML to a file %%
         #htmlFile = open("_output.html", "w+")
@@ -321,12 +488,87 @@ class MainWindow(QMainWindow):
         #self.exportToHTMLFile("_output.html")
         #%%                                                 %%
         #%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-        self.notePreview.setHtml(htmlDocument,  QUrl("file://" + os.getcwd() + "/" + quarkSettings.start_html_template_file) )
+        self.notePreview.setBlocks(htmlBlocks)
+        self.updateDelay.recordRenderTime( (time.monotonic() - self._renderRequestTime) * 1000 )
+        if self._firstUndisplayedEdit is not None:  #all edits are now shown in the preview
+            metrics.record("preview latency", (time.monotonic() - self._firstUndisplayedEdit) * 1000)
+            self._firstUndisplayedEdit = None
+        self._displayedRevision = revision
+        self._displayedBlocks = htmlBlocks
+        self._renderedBlocks = renderedBlocks
+        tracer.instant("preview displayed", category="preview", revision=revision)
+
+        if self._storeNextPreview and self.storePreviewInCache():  #the note was just opened and was not in the disk cache
+            self._storeNextPreview = False
+
+        if any(block.pending for block in htmlBlocks):  #parts of the preview still have to be rendered
+            self.fillPreviewTimer.start()
+
+
+    def showCachedPreview(self, noteFilePath):
+        """Slot called when a note is opened.  Displays its preview from the disk cache right away, if it is
+there.  The note is still rendered as usual, which updates the preview if the cached one is outdated."""
+
+        self._storeNextPreview = False
+        self._firstUndisplayedEdit = None   #opening a note is not an edit (its time is recorded by the editor)
+        if self.diskCache is None:
+            return
+
+        blocks = self.diskCache.load(noteFilePath, self.noteEditor.toPlainText())
+        if blocks is not None:
+            if self.imageCache is not None:     #the cache holds the blocks with their original images
+                self.imageCache.setTargetWidth( self.notePreview.width() )
+                blocks = self.imageCache.rewriteBlocks(blocks)
+            self.notePreview.setBlocks(blocks)
+        else:
+            self._storeNextPreview = True
+
+
+    def storePreviewInCache(self):
+        """Stores the preview in the disk cache (in the background) if it is complete and up to date with
+the note.  The blocks are stored as rendered, before their images were replaced by downscaled copies, as
+the copies depend on the width of the preview and may not be ready yet.  Returns True if the preview is
+being stored."""
+
+        notePath = self.noteEditor.getNotePath()
+        if self.diskCache is None or notePath == "" or self._displayedRevision != self._noteRevision:
+            return False
+        if any(block.pending for block in self._displayedBlocks):
+            return False
+
+        text = self.noteEditor.toPlainText()
+        QThreadPool.globalInstance().start( FunctionTask(self.diskCache.store, notePath, text, self._renderedBlocks) )
+        return True
+
+
+    def incrementNoteRevision(self):
+        """Slot called when the text in the note editor changes.  Marks renders of older text as stale."""
+
+        self._noteRevision += 1
+
+
+    def scheduleUpdate(self):
+        """Slot called when the text in the note editor changes.  (Re)starts the timer which delays the
+preview update, or updates the preview right away if it has been lagging behind for too long."""
+
+        self.updateDelay.editMade()
+        if self._firstUndisplayedEdit is None:
+            self._firstUndisplayedEdit = time.monotonic()
+        if not self.updateDelayTimer.isActive():
+            self._debounceStart = tracer.now()  #the debounce wait starts with the first edit since the last update
+        if self.updateDelay.isStale():
+            self.updateDelayTimer.stop()
+            self.updateSlot()
+        elif quarkSettings.adaptive_update_delay:
+            self.updateDelayTimer.start( self.updateDelay.delay(self.noteEditor.document().characterCount()) )
+        else:
+            self.updateDelayTimer.start()
 
 
     def updateSlot(self):
         """Slot called to update the previewer when the text in the note editor changes."""
 
+        tracer.complete("debounce wait", self._debounceStart, category="preview")
         if self.notePreview.isVisible() :
             self.updatePreview()
 
@@ -350,7 +592,10 @@ class MainWindow(QMainWindow):
             if len( self.noteEditor.toPlainText() ) > 0:
                 self.saveAsFileAction()
         else:                                   #else, just save the file
+            start = time.monotonic()
             self.noteEditor.saveFileRequest()
+            metrics.record("save", (time.monotonic() - start) * 1000)
+            self.storePreviewInCache()              #the saved note can now be previewed from the cache
 
 
     def saveAsFileAction(self):
@@ -428,7 +673,12 @@ class MainWindow(QMainWindow):
     def syncPreviewScroll(self):
         """Scrolles note preview when editor is scrolled ('scrollPosition' is not used)."""
 
-        if self._syncScroll == True:
+        if self._syncScroll == True and not self._syncingEditor:
+            if self.notePreview.persistent:             #the preview maps lines to offsets itself, so just throttle the requests
+                if not self.syncScrollTimer.isActive():
+                    self.syncScrollTimer.start()
+                return
+
             editorVal = self.noteEditor.verticalScrollBar().value()     #get the scroll height of the editor window
             if editorVal == 0:                                          #if it is '0' then just seth the height of the preview window to '0' also (can prevent division by zero error)
                 viewVal = 0
@@ -442,22 +692,29 @@ class MainWindow(QMainWindow):
             self.notePreview.page().mainFrame().setScrollBarValue(Qt.Vertical, viewVal) #set the calculated scroll height on the preview window
 
 
-    def syncEditScroll(self):
-        """Scrolles note editor when previewer is scrolled ('scrollPosition' is not used)."""
-        #This method is not currently used as I haven't found an appropriate signal to connect it to
+    def scrollPreviewToEditor(self):
+        """Scrolls the preview to the source line at the top of the editor."""
+
+        #the editor scrolls by visual lines, find the (fractional) line of the note it corresponds to
+        visualLine = self.noteEditor.verticalScrollBar().value()
+        block = self.noteEditor.document().findBlockByLineNumber(visualLine)
+        line = block.blockNumber() + float(visualLine - block.firstLineNumber()) / max(1, block.lineCount())
+
+        self.notePreview.scrollToLine(line)
+
+
+    def syncEditScroll(self, line):
+        """Scrolles note editor when previewer is scrolled, so the (fractional) source line 'line' is at the top."""
 
         if self._syncScroll == True:
-            viewVal = self.notePreview.page().mainFrame().scrollBarValue(Qt.Vertical)
-            if viewVal == 0:
-                editorVal = 0
-            else:
-                viewMax = self.notePreview.page().mainFrame().scrollBarMaximum(Qt.Vertical)
-                viewMin = self.notePreview.page().mainFrame().scrollBarMinimum(Qt.Vertical)
-                editorMax = self.noteEditor.verticalScrollBar().maximum()
-                editorMin = self.noteEditor.verticalScrollBar().minimum()
-                editorVal = viewVal/(viewMax - viewMin)*(editorMax - editorMin)
+            block = self.noteEditor.document().findBlockByNumber(int(line))
+            if not block.isValid():
+                return
+            visualLine = block.firstLineNumber() + int(round( (line - int(line))*block.lineCount() ))
 
-            self.noteEditor.verticalScrollBar().setValue(editorVal)
+            self._syncingEditor = True      #don't scroll the preview back
+            self.noteEditor.verticalScrollBar().setValue(visualLine)
+            self._syncingEditor = False
 
 
     def loadSession(self):
@@ -596,6 +853,81 @@ THE SOFTWARE.</p>""")
         QMessageBox.aboutQt(self, "About Qt - Quark Note Taker")
 
 
+    def setTracing(self, state):
+        """Starts or stops recording a performance trace."""
+
+        tracer.setEnabled(state)
+        self.notePreview.setTracing(state)
+
+
+    def exportTraceAction(self):
+        """Action to save the recorded performance trace to a file, which can be opened in a trace viewer
+(e.g. chrome://tracing or https://ui.perfetto.dev)."""
+
+        if tracer.eventCount() == 0:
+            QMessageBox.information(self, "Export Performance Trace", "No trace was recorded.  Use Help > Record Performance Trace to start recording.")
+            return
+
+        searchPath = os.path.join(os.path.expanduser("~"), "quark-trace.json")
+        filePath, fileType = QFileDialog.getSaveFileName(self, "Export Performance Trace", searchPath, "Trace (*.json)")
+        if not filePath == "":
+            tracer.export(filePath)
+
+
+    def setProfiling(self, state):
+        """Starts the sampling profiler, or stops it and saves the profile to a file (as collapsed stacks,
+which can be turned into a flame graph with e.g. flamegraph.pl or https://www.speedscope.app)."""
+
+        if state:
+            profiler.start()
+            return
+
+        profiler.stop()
+        if profiler.sampleCount == 0:
+            return
+        searchPath = os.path.join(os.path.expanduser("~"), "quark-profile.txt")
+        filePath, fileType = QFileDialog.getSaveFileName(self, "Save Profile", searchPath, "Collapsed stacks (*.txt)")
+        if not filePath == "":
+            profiler.write(filePath)
+
+
+    def setMetricsVisible(self, state):
+        """Shows or hides the performance metrics in the status bar."""
+
+        self.statusBar().setVisible(state)
+        if state:
+            self.updateMetricsDisplay()
+            self.metricsDisplayTimer.start()
+        else:
+            self.metricsDisplayTimer.stop()
+
+
+    def updateMetricsDisplay(self):
+        """Shows the median (p50) and 99th percentile (p99) of the recent performance metrics in the status bar."""
+
+        parts = []
+        for name in ("preview latency", "highlight", "save", "note open"):
+            p50, p99 = metrics.percentiles(name)
+            if p50 is not None:
+                parts.append("{}: {:.1f} / {:.1f} ms".format(name, p50, p99))
+        spellChecker = self.noteEditor.highlighter.getSpellChecker()
+        if spellChecker is not None:
+            stats = spellChecker.stats()
+            if stats["hits"] + stats["misses"] > 0:
+                parts.append("spelling cache hits: {:.0%}".format(stats["hit_rate"]))
+        if parts:
+            self.metricsLabel.setText("p50 / p99  " + "  |  ".join(parts))
+        else:
+            self.metricsLabel.setText("no performance metrics yet")
+
+
+    def writeMetrics(self):
+        """Appends the metrics recorded since the last time to the metrics file (if one is set)."""
+
+        if quarkSettings.metrics_file:
+            metrics.dump( os.path.expanduser(quarkSettings.metrics_file) )
+
+
     def renameNoteAction(self):
         """Open input dialog to rename the current note."""
 
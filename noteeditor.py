@@ -41,6 +41,7 @@ License:
 #python modules
 import sys
 import os
+import time
 import locale
 import enchant
 
@@ -50,7 +51,9 @@ from PyQt5.QtGui import QTextOption, QTextCursor, QFontMetrics, QFont
 from PyQt5.QtWidgets import QPlainTextEdit, QMenu, QActionGroup, QAction
 
 #Quark specific
+import settings as quarkSettings
 from highlighter import Highlighter
+from quarkmetrics import metrics
 
 
 
@@ -122,9 +125,8 @@ class NoteEditor(QPlainTextEdit):
         else:
             self.dictionary = enchant.Dict(action.text())
 
-        # rehighlight the text to find spelling errors
+        # highlight the text again to find spelling errors (once it is tokenized, if it is being tokenized in the background)
         self.highlighter.setDictionary(self.dictionary)
-        self.highlighter.rehighlight()
 
 
     def showContextMenu(self, position):
@@ -139,11 +141,12 @@ class NoteEditor(QPlainTextEdit):
         word = textCursor.selectedText()
 
         # if a word was selected and it's misspelled, show a suggestion menu
-        if word and not len(word) is 0:
-            if not self.dictionary.check(word):
+        spellChecker = self.highlighter.getSpellChecker()
+        if word and not len(word) is 0 and spellChecker:
+            if not spellChecker.check(word):
 
                 # create the suggestion menu
-                for suggestion in self.dictionary.suggest(word):
+                for suggestion in spellChecker.suggest(word):
                     a = contextMenu.addAction(suggestion)
                     a.setData("custom")
 
@@ -171,9 +174,9 @@ class NoteEditor(QPlainTextEdit):
         # if a suggestion was selected, replace the current word with it
         if action and action.data() == "custom":
             if action.text() == "Add to dictionary":
-                self.dictionary.add(word)
+                spellChecker.add(word)
             elif action.text() == "Remove from dictionary":
-                self.dictionary.remove(word)
+                spellChecker.remove(word)
             else:
                 textCursor.removeSelectedText()
                 textCursor.insertText(action.text())
@@ -183,11 +186,19 @@ class NoteEditor(QPlainTextEdit):
         """Open a file using its path (string) in the editor.  Return 'True' if successful, 'False' otherwise."""
 
         noErrors = True                 #set return state
+        start = time.perf_counter()
         noteFile = open(filePath, "r")
         if noteFile:                    #if the file was opened successfully
-            self.setPlainText( noteFile.read() )    #set its contents in the editor
+            text = noteFile.read()
+            if len(text) >= quarkSettings.background_highlighting_threshold:
+                self.highlighter.highlightInBackground(text)    #big notes are tokenized in a worker thread
+            else:
+                self.highlighter.cancelBackgroundHighlighting()
+            self.setPlainText(text)                 #set its contents in the editor
+            self.highlighter.noteLoaded()           #blocks edited from now on are highlighted right away
             self.noteFilePath = filePath            #save the file path to the internal variable
             self.noteFileChanged.emit( os.path.abspath(self.noteFilePath) ) #emit signal to notify other objects of file change
+            metrics.record("note open", (time.perf_counter() - start) * 1000)   #reading and highlighting the note
         else:                           #else, return an error
             noErrors = False
 
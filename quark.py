@@ -44,11 +44,7 @@ License:
 import sys
 import os
 
-#Qt5 modules
-from PyQt5.QtWidgets import QApplication
-
 #Quark specific modules
-from mainwindow import MainWindow
 import settings as quarkSettings
 
 
@@ -82,6 +78,25 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """)
 
+    #run the headless render server if requested ('quark.py serve --help' for its options)
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        import quarkserver
+        sys.exit( quarkserver.main(sys.argv[2:]) )
+
+    #the GUI modules are only imported when needed, so the server can run without a display
+    from PyQt5.QtWidgets import QApplication
+    from mainwindow import MainWindow
+
+    #profile Quark from the start if requested (with '--profile FILE' or the QUARK_PROFILE environment variable)
+    from quarkprofiler import profiler
+    profileFile = os.environ.get("QUARK_PROFILE", "")
+    if "--profile" in sys.argv:
+        i = sys.argv.index("--profile")
+        profileFile = sys.argv[i + 1] if i + 1 < len(sys.argv) else "quark-profile.txt"
+        del sys.argv[i:i + 2]
+    if profileFile:
+        profiler.start()
+
     #create Quark application
     app = QApplication(sys.argv)
     win = MainWindow()
@@ -93,3 +108,9 @@ THE SOFTWARE.
     #execute the app
     win.show()
     app.exec_()
+
+    #write the profile (unless it was stopped and saved from the Help menu)
+    if profileFile and profiler.isRunning():
+        profiler.stop()
+        profiler.write(profileFile)
+        print("Profile written to", os.path.abspath(profileFile))
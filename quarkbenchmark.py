@@ -0,0 +1,527 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkbenchmark.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains the benchmark command, used to measure how fast notes are
+    rendered.  Run 'python3 quarkbenchmark.py --help' for usage.
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import tracemalloc
+import multiprocessing
+
+#extra modules
+from pygments import highlight
+
+#Quark specific
+import settings as quarkSettings
+from quarkrenderer import QuarkRenderer, highlightCache, getLexer
+from quarkmarkdown import engines, availableEngines
+
+
+
+#~corpus~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def loadCorpus(paths):
+    """Returns the list of notes (as strings) found at 'paths', which are note files or directories
+searched recursively for Markdown files."""
+
+    notes = []
+    for path in paths:
+        path = os.path.abspath(os.path.expanduser(path))
+        if os.path.isdir(path):
+            for directory, subdirectories, files in os.walk(path):
+                subdirectories.sort()
+                notes.extend(os.path.join(directory, f) for f in sorted(files) if f.endswith((".md", ".markdown")))
+        else:
+            notes.append(path)
+
+    corpus = []
+    for notePath in notes:
+        noteFile = open(notePath, "r")
+        corpus.append( noteFile.read() )
+        noteFile.close()
+    return corpus
+
+
+
+#~engine benchmark~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def _peakMemory(engine, corpus):
+    """Renders every note of 'corpus' once with 'engine' and returns the peak memory (in KiB) allocated
+during the pass, as traced by 'tracemalloc'.  Only memory allocated through Python is traced."""
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        for note in corpus:
+            engine(note)
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def benchmarkEngine(engineName, corpus, repeat):
+    """Renders every note of 'corpus' 'repeat' times with the Markdown engine 'engineName'.  Returns a
+dictionary with the timings (in seconds) of the fastest pass and the peak memory used by a pass.  Tracing
+the memory slows the renders down, so it is measured in a pass of its own, after the timed ones.  Run in a
+process of its own, so the memory use of one engine does not hide the other's."""
+
+    renderer = QuarkRenderer(standalone=False)
+    engine = engines[engineName](renderer)
+    renderer.deferHighlighting = False
+    engine("warm up")               # load the lexers, compile regular expressions, etc.
+
+    passTimes = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        for note in corpus:
+            engine(note)
+        passTimes.append(time.perf_counter() - start)
+
+    return {"engine": engineName,
+            "best": min(passTimes),
+            "mean": sum(passTimes) / len(passTimes),
+            "memory": _peakMemory(engine, corpus)}
+
+
+def benchmarkEngines(corpus, engineNames, repeat):
+    """Benchmarks each of the engines 'engineNames' on 'corpus' (see 'benchmarkEngine()') and returns the
+list of results."""
+
+    # processes are spawned, not forked, so each one starts from a clean slate
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for engineName in engineNames:
+        pool = context.Pool(1)
+        try:
+            results.append( pool.apply(benchmarkEngine, (engineName, corpus, repeat)) )
+        finally:
+            pool.close()
+            pool.join()
+    return results
+
+
+def printEngineResults(results, corpusSize):
+    """Prints the results of 'benchmarkEngines()' as a table, fastest engine first."""
+
+    print("{:<18}{:>12}{:>12}{:>12}{:>14}".format("engine", "best (ms)", "mean (ms)", "MiB/s", "memory (KiB)"))
+    for result in sorted(results, key=lambda r: r["best"]):
+        throughput = corpusSize / (1024.0 * 1024.0) / result["best"] if result["best"] > 0 else float("inf")
+        print("{:<18}{:>12.1f}{:>12.1f}{:>12.2f}{:>14}".format(result["engine"], result["best"] * 1000, result["mean"] * 1000,
+                                                               throughput, result["memory"]))
+
+
+
+#~synthetic corpus~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# approximate size (in bytes) of the synthetic notes
+noteSizes = {"small": 8 * 1024, "medium": 64 * 1024, "large": 512 * 1024}
+
+_words = ("note", "quark", "render", "preview", "markdown", "block", "cache", "value", "thread", "window", "editor",
+          "matrix", "vector", "function", "result", "table", "column", "index", "stream", "buffer", "signal", "layout")
+
+_codeSamples = {
+    "python": ("def {0}({1}, {2}):\n", "    {0} = {1} + {2} * 2  # {3}\n", "    return [{0} for {1} in range({2})]\n"),
+    "c": ("int {0}(int {1}, int {2}) {{\n", "    {0} = {1} + {2} * 2; /* {3} */\n", "    return {0} ? {1} : {2};\n}}\n"),
+    "javascript": ("function {0}({1}, {2}) {{\n", "    var {0} = {1} + {2} * 2; // {3}\n", "    return {0}.map(function (x) {{ return x + {1}; }});\n}}\n"),
+    "java": ("public int {0}(int {1}, int {2}) {{\n", "    int {0} = {1} + {2} * 2; // {3}\n", "    return {0} > 0 ? {1} : {2};\n}}\n"),
+    "rust": ("fn {0}({1}: i32, {2}: i32) -> i32 {{\n", "    let {0} = {1} + {2} * 2; // {3}\n", "    if {0} > 0 {{ {1} }} else {{ {2} }}\n}}\n"),
+    "sql": ("SELECT {0}, {1}\n", "  FROM {2} WHERE {0} > 2 -- {3}\n", "  ORDER BY {1};\n"),
+    "bash": ("{0}() {{\n", "    local {0}=\"${1}\"  # {3}\n", "    echo \"${0}\" | grep {2}\n}}\n"),
+}
+
+
+def _sentence(rand, wordCount):
+    words = [rand.choice(_words) for i in range(wordCount)]
+    words[rand.randrange(wordCount)] = "*{}*".format(rand.choice(_words))
+    return " ".join(words).capitalize() + "."
+
+
+def _proseSection(rand):
+    lines = ["## {}\n\n".format(_sentence(rand, 4))]
+    for i in range(rand.randint(2, 4)):
+        lines.append( " ".join(_sentence(rand, rand.randint(8, 20)) for j in range(rand.randint(3, 6))) + "\n\n" )
+    lines.extend( "* {} [link](http://example.com/{})\n".format(_sentence(rand, 6), i) for i in range(rand.randint(2, 5)) )
+    return "".join(lines) + "\n"
+
+
+def _codeSection(rand):
+    lang = rand.choice(sorted(_codeSamples.keys()))
+    first, middle, last = _codeSamples[lang]
+    names = [rand.choice(_words) + str(rand.randrange(100)) for i in range(4)]
+    lines = ["{}\n\n```{}\n".format(_sentence(rand, 8), lang), first.format(*names)]
+    for i in range(rand.randint(10, 50)):
+        rand.shuffle(names)
+        lines.append( middle.format(*names) )
+    lines.append( last.format(*names) )
+    return "".join(lines) + "```\n\n"
+
+
+def _mathSection(rand):
+    def expression():
+        a, b, c = (rand.choice("abcdefxyz") for i in range(3))
+        return rand.choice(("{0}_{{{1}}}^2 + {2}", "\\frac{{{0}}}{{{1} + {2}}}", "\\sum_{{{0}=1}}^{{n}} {1}_{0} {2}",
+                            "\\int_0^\\infty e^{{-{0}{1}}} d{2}", "\\sqrt{{{0}^2 + {1}^2}} \\leq {2}")).format(a, b, c)
+
+    lines = []
+    for i in range(rand.randint(2, 4)):
+        lines.append( " ".join("{} ${}$".format(_sentence(rand, 6), expression()) for j in range(rand.randint(3, 6))) + "\n\n" )
+    lines.append( "$$\n{} = {}\n$$\n\n".format(expression(), expression()) )
+    return "".join(lines)
+
+
+def _tableSection(rand):
+    columns = 6
+    lines = ["| " + " | ".join(rand.choice(_words) for i in range(columns)) + " |\n", "|" + "---|" * columns + "\n"]
+    for row in range(rand.randint(50, 200)):
+        lines.append( "| " + " | ".join(str(rand.randrange(10000)) if i % 2 else rand.choice(_words) for i in range(columns)) + " |\n" )
+    return "".join(lines) + "\n"
+
+
+# the kinds of synthetic notes, as the section generators each one is made of
+noteKinds = {"prose": (_proseSection,),
+             "code": (_codeSection,),
+             "math": (_mathSection,),
+             "tables": (_tableSection,),
+             "mixed": (_proseSection, _codeSection, _mathSection, _tableSection)}
+
+
+def generateNote(kind, size, seed=0):
+    """Returns a synthetic note of about 'size' bytes, made of sections of the kind 'kind' (see 'noteKinds'),
+in turn.  The same arguments always produce the same note."""
+
+    rand = random.Random("{}-{}-{}".format(kind, size, seed))
+    generators = noteKinds[kind]
+    sections = []
+    totalSize = 0
+    while totalSize < size:
+        sections.append( generators[len(sections) % len(generators)](rand) )
+        totalSize += len(sections[-1])
+    return "# {} note\n\n{}".format(kind.capitalize(), "".join(sections))
+
+
+
+#~benchmark suite~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+_fencedCode = re.compile(r"^```(\w+)\n(.*?)^```$", re.MULTILINE | re.DOTALL)
+
+
+def timeRuns(run, repeat, setup=None):
+    """Calls 'run' 'repeat' times (after calling 'setup', untimed, if given) and returns the list of durations."""
+
+    durations = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def benchmarkRender(note, repeat):
+    """Times the rendering of a whole note by 'QuarkRenderer' and Misaka, starting from an empty highlight cache."""
+
+    renderer = QuarkRenderer()
+    markdown = engines["misaka"](renderer)
+    return timeRuns(lambda: markdown(note), repeat, setup=highlightCache.clear)
+
+
+def benchmarkPygments(note, repeat):
+    """Times the highlighting of all the code blocks of a note by Pygments (without the highlight cache).
+Returns 'None' if the note has no code blocks."""
+
+    codeBlocks = [(getLexer(lang), code) for lang, code in _fencedCode.findall(note) if getLexer(lang) is not None]
+    if not codeBlocks:
+        return None
+
+    formatter = QuarkRenderer().formatter
+    def highlightAll():
+        for lexer, code in codeBlocks:
+            highlight(code, lexer, formatter)
+    return timeRuns(highlightAll, repeat)
+
+
+class PreviewBenchmark(object):
+    """Times 'MainWindow.updatePreview()', from the request to the display of the rendered note in the preview,
+using the offscreen Qt platform.  The window is created once and reused for all the notes."""
+
+    timeout = 60.0  # longest time (in seconds) to wait for a preview update
+
+    def __init__(self):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtGui import QTextCursor
+        self.endOfNote = QTextCursor.End
+
+        # the benchmark must not touch the user's notes or caches
+        self.notesDir = tempfile.mkdtemp(prefix="quark-benchmark-")
+        quarkSettings.notes_dir = self.notesDir
+        quarkSettings.render_cache = False
+        quarkSettings.image_cache = False
+
+        self.app = QApplication.instance() or QApplication([sys.argv[0]])
+        from mainwindow import MainWindow
+        self.window = MainWindow()
+        self.window.noteEditor.noteFilePath = ""    # never save the benchmark notes
+        self.window.autosaveTimer.stop()
+        self.window.updateDelay.maxStaleness = float("inf")    # updates are only requested by the benchmark
+        self.window.show()
+        self._waitFor(self.window.notePreview.isReady)
+
+    def _waitFor(self, condition):
+        deadline = time.perf_counter() + self.timeout
+        while not condition():
+            if time.perf_counter() > deadline:
+                raise RuntimeError("timed out waiting for the preview")
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def _update(self):
+        self.window.updatePreview()
+        self._waitFor(lambda: self.window._displayedRevision == self.window._noteRevision)
+        self.window.fillPreviewTimer.stop()     # deferred work must not run during the next measurement
+
+    def _load(self, note):
+        """Loads 'note' in the editor with empty caches and an empty preview."""
+
+        self.window.htmlRenderer.clearCache()
+        highlightCache.clear()
+        self.window.notePreview.setBlocks([])
+        self.window.updateDelayTimer.stop()
+        self.window.noteEditor.setPlainText(note)
+        self.window.updateDelayTimer.stop()     # the update is requested explicitly
+
+    def coldRuns(self, note, repeat):
+        """Times updates of the preview for a note which was just loaded."""
+
+        return timeRuns(self._update, repeat, setup=lambda: self._load(note))
+
+    def editRuns(self, note, repeat):
+        """Times updates of the preview after a one character edit at the end of a note."""
+
+        self._load(note)
+        self._update()
+        def edit():
+            self.window.noteEditor.moveCursor(self.endOfNote)
+            self.window.noteEditor.insertPlainText("x")
+            self.window.updateDelayTimer.stop()
+        return timeRuns(self._update, repeat, setup=edit)
+
+    def close(self):
+        self.window.hide()
+        self.window.renderWorker.shutdown()
+        self.window.htmlRenderer.close()
+        shutil.rmtree(self.notesDir, ignore_errors=True)
+
+
+def summarize(durations):
+    """Returns the statistics (in milliseconds) of a list of durations (in seconds)."""
+
+    return {"best": min(durations) * 1000,
+            "median": statistics.median(durations) * 1000,
+            "mean": statistics.mean(durations) * 1000,
+            "runs": len(durations)}
+
+
+def runSuite(kinds, sizes, stages, repeat):
+    """Runs the benchmark 'stages' on synthetic notes of every kind and size.  Returns the results as a
+dictionary mapping '<stage>/<kind>-<size>' to the statistics of the runs (see 'summarize()')."""
+
+    notes = [("{}-{}".format(kind, size), generateNote(kind, noteSizes[size])) for size in sizes for kind in kinds]
+
+    preview = None
+    if "update_preview" in stages or "update_preview_edit" in stages:
+        try:
+            preview = PreviewBenchmark()
+        except ImportError as error:
+            print("Skipping the preview stages: {}".format(error))
+
+    results = {}
+    try:
+        for name, note in notes:
+            stageRuns = {}
+            if "render" in stages:
+                stageRuns["render"] = benchmarkRender(note, repeat)
+            if "pygments" in stages:
+                stageRuns["pygments"] = benchmarkPygments(note, repeat)
+            if preview is not None and "update_preview" in stages:
+                stageRuns["update_preview"] = preview.coldRuns(note, repeat)
+            if preview is not None and "update_preview_edit" in stages:
+                stageRuns["update_preview_edit"] = preview.editRuns(note, repeat)
+
+            for stage, durations in sorted(stageRuns.items()):
+                if durations is not None:
+                    key = "{}/{}".format(stage, name)
+                    results[key] = summarize(durations)
+                    print("{:<40}{:>12.2f} ms".format(key, results[key]["median"]))
+    finally:
+        if preview is not None:
+            preview.close()
+
+    return results
+
+
+def saveResults(path, results):
+    """Writes benchmark results to the JSON file 'path', along with a description of the machine."""
+
+    document = {"format": 1,
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "processor": platform.processor(),
+                "results": results}
+    resultsFile = open(path, "w")
+    json.dump(document, resultsFile, indent=1, sort_keys=True)
+    resultsFile.close()
+
+
+def compareResults(baseline, current, threshold, minDelta):
+    """Compares the median times of two sets of results.  Returns the list of '(name, baseline, current,
+ratio, regressed)' tuples for the benchmarks found in both; a benchmark regressed if it got slower by more
+than 'threshold' (a fraction) and by more than 'minDelta' milliseconds (to ignore the noise of tiny times)."""
+
+    comparisons = []
+    for name in sorted(set(baseline) & set(current)):
+        before = baseline[name]["median"]
+        after = current[name]["median"]
+        ratio = after / before if before > 0 else float("inf")
+        regressed = ratio > 1 + threshold and after - before > minDelta
+        comparisons.append( (name, before, after, ratio, regressed) )
+    return comparisons
+
+
+
+#~command line~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def runEnginesCommand(options):
+    corpus = loadCorpus(options.paths)
+    if not corpus:
+        print("No notes found.")
+        return 1
+    engineNames = options.engines or availableEngines()
+    missing = [name for name in engineNames if not engines[name].isAvailable()]
+    if missing:
+        print("Not available: {}".format(", ".join(missing)))
+        engineNames = [name for name in engineNames if name not in missing]
+
+    corpusSize = sum(len(note.encode("utf-8")) for note in corpus)
+    print("{} notes, {} KiB, {} passes per engine\n".format(len(corpus), corpusSize // 1024, options.repeat))
+    printEngineResults(benchmarkEngines(corpus, engineNames, max(1, options.repeat)), corpusSize)
+    return 0
+
+
+def runSuiteCommand(options):
+    results = runSuite(options.kinds.split(","), options.sizes.split(","), options.stages.split(","), max(1, options.repeat))
+    if options.output:
+        saveResults(options.output, results)
+        print("Results written to '{}'".format(options.output))
+    return 0
+
+
+def runCompareCommand(options):
+    documents = []
+    for path in (options.baseline, options.current):
+        resultsFile = open(path, "r")
+        documents.append( json.load(resultsFile)["results"] )
+        resultsFile.close()
+
+    comparisons = compareResults(documents[0], documents[1], options.threshold, options.min_delta)
+    print("{:<40}{:>14}{:>14}{:>9}".format("benchmark", "baseline (ms)", "current (ms)", "ratio"))
+    for name, before, after, ratio, regressed in comparisons:
+        print("{:<40}{:>14.2f}{:>14.2f}{:>9.2f}{}".format(name, before, after, ratio, "  REGRESSION" if regressed else ""))
+
+    regressions = sum(1 for comparison in comparisons if comparison[4])
+    if regressions:
+        print("\n{} benchmark(s) regressed by more than {:.0%}".format(regressions, options.threshold))
+        return 1
+    return 0
+
+
+def main(arguments):
+    parser = argparse.ArgumentParser(description="Measure how fast Quark renders notes.")
+    commands = parser.add_subparsers(dest="command")
+
+    enginesCommand = commands.add_parser("engines", help="compare the Markdown engines on a corpus of notes")
+    enginesCommand.add_argument("paths", nargs="*", default=[quarkSettings.notes_dir],
+                                help="note files or directories of notes (default: the notes directory)")
+    enginesCommand.add_argument("-e", "--engine", action="append", dest="engines", choices=sorted(engines.keys()),
+                                help="engine to benchmark (can be repeated, default: all the available engines)")
+    enginesCommand.add_argument("-r", "--repeat", type=int, default=5, help="number of passes over the corpus (default: 5)")
+    enginesCommand.set_defaults(function=runEnginesCommand)
+
+    suiteCommand = commands.add_parser("suite", help="time the render stages on synthetic notes")
+    suiteCommand.add_argument("-k", "--kinds", default=",".join(sorted(noteKinds.keys())),
+                              help="comma separated kinds of notes (default: %(default)s)")
+    suiteCommand.add_argument("-s", "--sizes", default="small,medium", help="comma separated sizes of notes, among {} (default: %(default)s)".format(
+                              ", ".join(sorted(noteSizes.keys()))))
+    suiteCommand.add_argument("-t", "--stages", default="render,pygments,update_preview,update_preview_edit",
+                              help="comma separated stages to time (default: %(default)s)")
+    suiteCommand.add_argument("-r", "--repeat", type=int, default=5, help="number of runs of each benchmark (default: 5)")
+    suiteCommand.add_argument("-o", "--output", help="JSON file the results are written to")
+    suiteCommand.set_defaults(function=runSuiteCommand)
+
+    compareCommand = commands.add_parser("compare", help="compare two result files, fail if a benchmark regressed")
+    compareCommand.add_argument("baseline", help="JSON results of the reference build")
+    compareCommand.add_argument("current", help="JSON results of the build to check")
+    compareCommand.add_argument("--threshold", type=float, default=0.1,
+                                help="slowdown (as a fraction of the baseline) considered a regression (default: %(default)s)")
+    compareCommand.add_argument("--min-delta", type=float, default=0.5,
+                                help="slowdowns smaller than this many milliseconds are ignored (default: %(default)s)")
+    compareCommand.set_defaults(function=runCompareCommand)
+
+    options = parser.parse_args(arguments)
+    if options.command is None:
+        parser.print_help()
+        return 1
+    return options.function(options)
+
+
+if __name__ == "__main__":
+    sys.exit( main(sys.argv[1:]) )
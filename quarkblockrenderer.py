@@ -0,0 +1,442 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkblockrenderer.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains the class used to render notes incrementally.  A note is split
+    into its top-level Markdown blocks and the HTML of each block is cached, so only the
+    blocks that changed since the last render have to be run through Misaka again.
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import re
+import bisect
+import hashlib
+import threading
+from collections import namedtuple
+
+#Quark specific
+from quarkrenderer import QuarkRenderer
+from quarkmarkdown import createMarkdown
+from quarktrace import tracer
+
+
+
+#~block splitting~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# a top-level Markdown block: its source text, the (0 based) number of its first line in
+# the note, the number of lines it spans in the note and a key identifying its content
+MarkdownBlock = namedtuple("MarkdownBlock", ["text", "firstLine", "lineCount", "key"])
+
+# a rendered block, as displayed in the preview: its unique key, its HTML, the lines it spans in
+# the note and whether it still has to be rendered (it is a placeholder inside the render window
+# or its code highlighting was deferred)
+KeyedBlock = namedtuple("KeyedBlock", ["key", "html", "firstLine", "lineCount", "pending"])
+
+_fenceStart = re.compile(r"^ {0,3}(`{3,}|~{3,})")                 # opening line of a fenced code block
+_listItem = re.compile(r"^ {0,3}([\*\+\-]|\d+[\.\)])\s")           # first line of a list item
+_linkDefinition = re.compile(r"^ {0,3}\[[^\]\n]+\]:\s*\S")         # a link reference definition ('[id]: url "title"')
+_quoteLine = re.compile(r"^ {0,3}>")                               # a line of a block quote
+_htmlStart = re.compile(r"^<(?:(!--)|([A-Za-z][A-Za-z0-9]*)(?![A-Za-z0-9]))")  # first line of a raw HTML block (or comment)
+
+# tags which start a raw HTML block (the same as Misaka's)
+_htmlBlockTags = frozenset(("blockquote", "del", "div", "dl", "fieldset", "figure", "form", "h1", "h2", "h3",
+                            "h4", "h5", "h6", "iframe", "ins", "math", "noscript", "ol", "p", "pre", "script",
+                            "style", "table", "ul"))
+
+
+def _htmlBlockEnd(lines, start):
+    """Returns the number of the last line of the raw HTML block starting at line 'start' of 'lines', or
+'None' if the line does not start one.  As for Misaka, the block ends at the first line ending with the
+closing tag (or with the end of the comment) which is followed by a blank line or by the end of the note."""
+
+    match = _htmlStart.match(lines[start])
+    if match is None:
+        return None
+    if match.group(1):
+        end = "-->"
+    elif match.group(2).lower() in _htmlBlockTags:
+        end = "</{}>".format(match.group(2).lower())
+    else:
+        return None
+
+    for lineNumber in range(start, len(lines)):
+        if lines[lineNumber].rstrip().lower().endswith(end) and \
+           (lineNumber + 1 == len(lines) or lines[lineNumber + 1].strip() == ""):
+            return lineNumber
+    return None     # not closed, so it is a paragraph
+
+
+def splitBlocks(text):
+    """Splits a note into its top-level Markdown blocks.  Returns a list of '(firstLine, blockText)' tuples.
+
+Blocks are normally separated by blank lines.  However, blank lines inside a fenced code block, a '$$'
+math block or a raw HTML block do not end the block, and neither do blank lines followed by an indented
+line (the continuation of a list item or an indented code block), by another item of the same list or by
+another line of the same block quote.  Tables never contain blank lines so they always end up in a single
+block."""
+
+    blocks = []         # list of blocks found so far
+    current = []        # lines of the block currently being built
+    firstLine = 0       # line number of the first line of the current block
+    pendingBlanks = 0   # number of blank lines seen since the last non-blank line
+    fence = None        # the fence string if inside a fenced code block
+    inMath = False      # whether inside a '$$' math block
+    htmlEnd = -1        # number of the last line of the raw HTML block, if inside one
+
+    lines = text.split("\n")
+    for lineNumber, line in enumerate(lines):
+
+        # inside a raw HTML block, everything up to its end belongs to the block
+        if lineNumber <= htmlEnd:
+            current.append(line)
+            continue
+
+        # inside a fenced code block, everything up to the closing fence belongs to the block
+        if fence is not None:
+            current.append(line)
+            stripped = line.strip()
+            if stripped.startswith(fence) and stripped.strip(fence[0]) == "":
+                fence = None
+            continue
+
+        if line.strip() == "" and not inMath:
+            if current:
+                pendingBlanks += 1
+            continue
+
+        # decide whether this line continues the current block or starts a new one
+        if current and pendingBlanks > 0 and not inMath:
+            isContinuation = line[:1] in (" ", "\t") and _listItem.match(line) is None
+            isSameList = _listItem.match(current[0]) is not None and _listItem.match(line) is not None
+            isSameQuote = _quoteLine.match(current[0]) is not None and _quoteLine.match(line) is not None
+            if isContinuation or isSameList or isSameQuote:
+                current.extend([""] * pendingBlanks)
+            else:
+                blocks.append( (firstLine, "\n".join(current)) )
+                current = []
+        if not current:
+            firstLine = lineNumber
+            if not inMath:
+                htmlEnd = _htmlBlockEnd(lines, lineNumber) or -1
+        pendingBlanks = 0
+        current.append(line)
+        if lineNumber <= htmlEnd:
+            continue
+
+        # track multi-line constructs
+        fenceMatch = _fenceStart.match(line)
+        if fenceMatch and not inMath:
+            fence = fenceMatch.group(1)
+        elif line.count("$$") % 2 == 1:
+            inMath = not inMath
+
+    if current:
+        blocks.append( (firstLine, "\n".join(current)) )
+
+    return blocks
+
+
+
+def renderBlock(markdown, text):
+    """Renders the block 'text' with the Markdown engine 'markdown'.  Returns a '(html, provisional)' tuple,
+where 'provisional' is True if the highlighting of a code block of the block was deferred."""
+
+    deferredBlocks = markdown.renderer.deferredBlocks
+    html = markdown(text)
+    return html, markdown.renderer.deferredBlocks > deferredBlocks
+
+
+
+#~block renderer~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class QuarkBlockRenderer(object):
+    """Renders notes incrementally using a per-block HTML cache.
+
+The note is split into its top-level blocks (see 'splitBlocks()') and each block is rendered on its own.
+The resulting HTML is cached using a hash of the block's source as key, so on the next render only the
+blocks that changed have to be rendered again.  Only the blocks of the most recent render are kept in
+the cache, so its size is bound by the size of the note.  When only a window of the note is rendered, only
+the blocks close to the window are kept, so the cache does not grow as the window moves through the note.
+
+Link reference definitions apply to the whole note, so they are appended to every block that could use
+them before rendering.  Calling the object renders a complete HTML document, just like 'misaka.Markdown'.
+Renders are serialized, so the same renderer can be used from the GUI thread and a worker thread.
+
+Blocks are rendered by the Markdown engine named 'engineName' (see 'quarkmarkdown'), by default the one
+selected by the 'markdown_engine' setting."""
+
+    def __init__(self, engineName=None):
+        self.renderer = QuarkRenderer(standalone=False)
+        self.markdown = createMarkdown(self.renderer, engineName)
+        self._cache = {}    # maps block keys to rendered HTML
+        self._lock = threading.Lock()
+
+
+    def __call__(self, text):
+        """Returns the complete HTML document for the note 'text'."""
+
+        return self.renderer.docHeader + self.renderBody(text) + self.renderer.docFooter
+
+
+    def renderBody(self, text):
+        """Returns the HTML for the note 'text', without the document header and footer."""
+
+        return "".join(html for block, html, provisional in self.renderBlocks(text))
+
+
+    def renderBlocks(self, text, window=None, budget=None, deferHighlighting=False):
+        """Returns a list of '(MarkdownBlock, html, provisional)' tuples, one for each top-level block of the
+note 'text'.  Only blocks which are not in the cache are actually rendered.
+
+If 'window' is given as a '(firstLine, lastLine)' tuple, only the blocks overlapping these lines are
+rendered, starting with the ones closest to the middle of the window, and the HTML of all other blocks
+is 'None'.  If 'budget' is given, rendering stops once that many characters have been rendered; the
+HTML of the blocks which did not fit in the budget is 'None' too.
+
+If 'deferHighlighting' is set, long code blocks are not highlighted (see 'QuarkRenderer.blockcode()').
+Such blocks are returned as provisional but not cached, so the next render without deferring highlights them."""
+
+        blocks = self.parseBlocks(text)
+
+        if window is None:
+            wanted = blocks
+        else:
+            middle = (window[0] + window[1]) / 2.0
+            wanted = [block for block in blocks if self._overlaps(block, window)]
+            wanted.sort(key=lambda block: abs(block.firstLine + block.lineCount / 2.0 - middle))
+
+        with self._lock:
+            # render the blocks which are not in the cache (only once, even if they appear more than once)
+            missing = {}
+            renderSize = 0
+            for block in wanted:
+                if block.key in self._cache or block.key in missing:
+                    continue
+                if budget is not None and renderSize >= budget:
+                    break
+                missing[block.key] = block.text
+                renderSize += len(block.text)
+            missingKeys = list(missing.keys())
+            rendered = dict(zip(missingKeys, self.renderMissingBlocks([missing[key] for key in missingKeys], deferHighlighting)))
+
+            # keep the cached blocks which are in the note (and close to the window, if any)
+            retained = None
+            if window is not None:
+                retained = (window[0] - (window[1] - window[0]), window[1] + (window[1] - window[0]))
+            newCache = dict( (key, html) for key, (html, provisional) in rendered.items() if not provisional )
+            renderedBlocks = []
+            for block in blocks:
+                html, provisional = rendered.get(block.key, (None, False))
+                if html is None:
+                    html = self._cache.get(block.key)
+                    if html is not None and (retained is None or self._overlaps(block, retained)):
+                        newCache[block.key] = html
+                if window is not None and not self._overlaps(block, window):
+                    html, provisional = None, False
+                renderedBlocks.append( (block, html, provisional) )
+
+            self._cache = newCache  # drop the blocks that are no longer in the note
+
+        return renderedBlocks
+
+
+    def renderMissingBlocks(self, blockTexts, deferHighlighting=False):
+        """Renders the blocks (given as a list of Markdown strings) that are not in the cache and returns
+a list with a '(html, provisional)' tuple for each one (see 'renderBlock()').  If 'deferHighlighting' is
+set, long code blocks are not highlighted.  Subclasses can override this method to render blocks elsewhere."""
+
+        self.renderer.deferHighlighting = deferHighlighting
+        try:
+            with tracer.span("markdown", engine=self.markdown.name, blocks=len(blockTexts)):
+                return [renderBlock(self.markdown, text) for text in blockTexts]
+        finally:
+            self.renderer.deferHighlighting = False
+
+
+    def close(self):
+        """Releases the resources used by the renderer.  Does nothing for this renderer."""
+
+        pass
+
+
+    def renderKeyedBlocks(self, text, window=None, budget=None, deferHighlighting=False):
+        """Returns a list of 'KeyedBlock's, one for each top-level block of the note 'text'.  The HTML of
+each block is wrapped in a '<div>' whose 'data-qk' attribute is set to the key of the block.  Keys are
+derived from the content of the blocks, so they are stable between renders and unique within the note.
+The 'data-line' and 'data-lines' attributes give the first line and the number of lines of the block in
+the note; they anchor the block to its source, e.g. for synchronized scrolling.
+
+'window' and 'budget' limit what is rendered, as for 'renderBlocks()'.  Blocks which are not rendered are
+replaced by empty placeholders with an estimated height.  Placeholders inside the window are marked as
+pending: they would have been rendered if the budget had allowed it.  Each run of consecutive blocks outside
+the window is replaced by a single placeholder spanning all their lines, so the number of blocks returned
+is bound by the size of the window rather than by the size of the note.
+
+'deferHighlighting' is passed on to 'renderBlocks()'.  Provisional blocks get a key of their own and are
+marked as pending, so they are replaced once rendered with highlighting."""
+
+        keyedBlocks = []
+        keyCounts = {}  # number of times each block appears in the note, used to keep keys unique
+        hidden = []     # run of consecutive blocks outside the window, not yet added as a placeholder
+        for block, html, provisional in self.renderBlocks(text, window, budget, deferHighlighting):
+            count = keyCounts.get(block.key, 0)
+            keyCounts[block.key] = count + 1
+            key = "{}-{}".format(block.key[:16], count)
+
+            if window is not None and not self._overlaps(block, window):
+                hidden.append(block)
+                continue
+            if hidden:
+                keyedBlocks.append( self._placeholder(hidden, False) )
+                hidden = []
+
+            if html is not None:
+                if provisional:
+                    key = key + "-d"
+                wrapped = "<div class=\"quark-block\" data-qk=\"{}\" data-line=\"{}\" data-lines=\"{}\">\n{}</div>\n".format(
+                              key, block.firstLine, block.lineCount, html)
+                keyedBlocks.append( KeyedBlock(key, wrapped, block.firstLine, block.lineCount, provisional) )
+            else:
+                keyedBlocks.append( self._placeholder([block], True, key + "-p") )
+
+        if hidden:
+            keyedBlocks.append( self._placeholder(hidden, False) )
+
+        return keyedBlocks
+
+
+    def parseBlocks(self, text):
+        """Splits the note 'text' into a list of 'MarkdownBlock's, ready to be rendered."""
+
+        splitText = splitBlocks(text)
+
+        # collect the link reference definitions of the whole note
+        definitions = []
+        for firstLine, blockText in splitText:
+            definitions.extend(line for line in blockText.split("\n") if _linkDefinition.match(line))
+        definitions = "\n".join(definitions)
+
+        blocks = []
+        for firstLine, blockText in splitText:
+            lineCount = blockText.count("\n") + 1
+            if definitions and "]" in blockText:
+                blockText = blockText + "\n\n" + definitions
+            key = hashlib.sha1(blockText.encode("utf-8")).hexdigest()
+            blocks.append( MarkdownBlock(blockText, firstLine, lineCount, key) )
+
+        return blocks
+
+
+    def clearCache(self):
+        """Discards all cached blocks, forcing the next render to start from scratch."""
+
+        with self._lock:
+            self._cache = {}
+
+
+    def _placeholder(self, blocks, pending, key=None):
+        """Returns a placeholder 'KeyedBlock' standing for the consecutive 'blocks', with the summed estimated
+height of the blocks.  Unless a 'key' is given, the key is made of the lines and the number of blocks the
+placeholder spans, which are unique within the note and change whenever its height does."""
+
+        firstLine = blocks[0].firstLine
+        lineCount = blocks[-1].firstLine + blocks[-1].lineCount - firstLine
+        height = sum(1.5 * (block.lineCount + 1) for block in blocks)
+        if key is None:
+            key = "lines-{}-{}-{}-p".format(firstLine, lineCount, len(blocks))
+        placeholder = "<div class=\"quark-block quark-placeholder\" data-qk=\"{}\" data-line=\"{}\" data-lines=\"{}\" style=\"height: {}em\"></div>\n".format(
+                          key, firstLine, lineCount, height)
+        return KeyedBlock(key, placeholder, firstLine, lineCount, pending)
+
+
+    def _overlaps(self, block, window):
+        """Returns True if 'block' overlaps the '(firstLine, lastLine)' window."""
+
+        return block.firstLine <= window[1] and block.firstLine + block.lineCount - 1 >= window[0]
+
+
+
+#~block patches~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def diffBlocks(oldBlocks, blocks):
+    """Compares two lists of 'KeyedBlock's and returns what has to change to turn the first into the second,
+as a '(removed, inserted, moved)' tuple:  'removed' is the list of the keys of the blocks to remove,
+'inserted' is a list of '(previousKey, key, html)' tuples, in order, giving the blocks to insert after the
+block 'previousKey' ('None' for the start of the note) and 'moved' maps the keys of the blocks which are
+kept but now span other lines to their '(firstLine, lineCount)'.
+
+The blocks kept are the longest sequence of blocks found in the same order in both lists, so a block moved
+in the note is removed and inserted again."""
+
+    oldIndexes = dict( (block.key, index) for index, block in enumerate(oldBlocks) )
+
+    # find the longest increasing sequence of old indexes (patience sorting)
+    tails = []          # tails[n] is the smallest old index ending a sequence of n + 1 blocks found so far
+    tailPositions = []  # positions in 'blocks' of these old indexes
+    previous = {}       # maps a position in 'blocks' to the position of the block before it in its sequence
+    for position, block in enumerate(blocks):
+        index = oldIndexes.get(block.key)
+        if index is None:
+            continue
+        length = bisect.bisect_left(tails, index)
+        if length == len(tails):
+            tails.append(index)
+            tailPositions.append(position)
+        else:
+            tails[length] = index
+            tailPositions[length] = position
+        previous[position] = tailPositions[length - 1] if length > 0 else None
+
+    kept = set()
+    position = tailPositions[-1] if tailPositions else None
+    while position is not None:
+        kept.add(blocks[position].key)
+        position = previous[position]
+
+    removed = [block.key for block in oldBlocks if block.key not in kept]
+    inserted = []
+    moved = {}
+    previousKey = None
+    for block in blocks:
+        if block.key not in kept:
+            inserted.append( (previousKey, block.key, block.html) )
+        else:
+            oldBlock = oldBlocks[oldIndexes[block.key]]
+            if (oldBlock.firstLine, oldBlock.lineCount) != (block.firstLine, block.lineCount):
+                moved[block.key] = (block.firstLine, block.lineCount)
+        previousKey = block.key
+
+    return removed, inserted, moved
@@ -0,0 +1,120 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkcache.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains a small bounded cache used to memoize expensive results
+    (e.g. highlighted code blocks).
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import threading
+from collections import OrderedDict
+
+
+
+#~LRU cache~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class LRUCache(object):
+    """A bounded, thread safe, least-recently-used cache.
+
+When more than 'maxSize' items are stored, the least recently used ones are discarded.  The number
+of hits and misses is counted so the effectiveness of the cache can be inspected using 'stats()'."""
+
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key, default=None):
+        """Returns the item stored under 'key' (marking it as recently used) or 'default' if there is none."""
+
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            else:
+                self.misses += 1
+                return default
+
+
+    def put(self, key, value):
+        """Stores 'value' under 'key', discarding the least recently used items if the cache is full."""
+
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxSize:
+                self._items.popitem(last=False)
+
+
+    def remove(self, key):
+        """Removes the item stored under 'key', if any."""
+
+        with self._lock:
+            self._items.pop(key, None)
+
+
+    def clear(self):
+        """Removes all items from the cache (the hit and miss counters are kept)."""
+
+        with self._lock:
+            self._items.clear()
+
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+
+    def stats(self):
+        """Returns a dictionary with the size of the cache and the hit/miss counters."""
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self._items),
+                    "max_size": self.maxSize,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "hit_rate": float(self.hits) / lookups if lookups > 0 else 0.0}
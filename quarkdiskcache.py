@@ -0,0 +1,146 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkdiskcache.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains the class used to store rendered notes on disk, so the preview
+    of a note can be displayed as soon as the note is opened.
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import os
+import json
+import hashlib
+import threading
+
+#Quark specific
+import quarkExtra
+from quarkrenderer import rendererFingerprint
+from quarkblockrenderer import KeyedBlock
+
+
+
+#~cache format~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+cacheFormatVersion = 2  # bump when the format of the rendered HTML changes
+
+
+
+#~cache directory~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def evictDirectory(directory, maxSize, suffixes):
+    """Deletes the least recently used files (by modification time) of 'directory' whose names end with one
+of 'suffixes', until these files add up to at most 'maxSize' bytes."""
+
+    entries = []
+    totalSize = 0
+    for name in os.listdir(directory):
+        if not name.endswith(suffixes):
+            continue
+        try:
+            status = os.stat(os.path.join(directory, name))
+        except OSError:
+            continue
+        entries.append( (status.st_mtime, status.st_size, name) )
+        totalSize += status.st_size
+
+    entries.sort()
+    for mtime, size, name in entries:
+        if totalSize <= maxSize:
+            break
+        try:
+            os.remove(os.path.join(directory, name))
+            totalSize -= size
+        except OSError:
+            pass
+
+
+
+#~disk cache~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class QuarkDiskCache(object):
+    """A persistent cache of rendered notes.
+
+Each entry holds the rendered blocks of a note (see 'KeyedBlock') and is stored in a file whose name is a
+hash of the path to the note, the hash of its content and the fingerprint of the renderer settings (see
+'rendererFingerprint()').  An entry is therefore only found if none of these changed since it was stored.
+When the cache directory grows over 'maxSize' bytes, the least recently used entries (by modification
+time, which is updated on every hit) are deleted."""
+
+    def __init__(self, directory, maxSize):
+        self.directory = quarkExtra.makeAbsoluteFromHome(directory)
+        self.maxSize = maxSize
+        self.fingerprint = "{}-{}".format(cacheFormatVersion, rendererFingerprint())
+        self._lock = threading.Lock()   # entries may be stored from a worker thread
+
+
+    def entryPath(self, notePath, text):
+        """Returns the path of the cache entry for the note at 'notePath' with the content 'text'."""
+
+        contentHash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        key = "{}\0{}\0{}".format(os.path.abspath(notePath), contentHash, self.fingerprint)
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+
+    def load(self, notePath, text):
+        """Returns the list of rendered blocks stored for the note, or 'None' if there is no entry for it."""
+
+        path = self.entryPath(notePath, text)
+        try:
+            with open(path, "r", encoding="utf-8") as entryFile:
+                blocks = [KeyedBlock(*block) for block in json.load(entryFile)]
+            os.utime(path, None)    # mark the entry as recently used
+        except (OSError, ValueError, TypeError):
+            return None
+
+        return blocks
+
+
+    def store(self, notePath, text, blocks):
+        """Stores the list of rendered blocks of the note, then evicts old entries if the cache is too big."""
+
+        path = self.entryPath(notePath, text)
+        with self._lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                temporaryPath = "{}.{}.tmp".format(path, threading.get_ident())
+                with open(temporaryPath, "w", encoding="utf-8") as entryFile:
+                    json.dump([list(block) for block in blocks], entryFile)
+                os.replace(temporaryPath, path)     # never leave a partially written entry behind
+            except OSError as error:
+                print("Could not store the rendered note in the cache: ", error)
+                return
+
+            evictDirectory(self.directory, self.maxSize, (".json",))
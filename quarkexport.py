@@ -0,0 +1,289 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkexport.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains the command used to export all the notes of the notes directory
+    to HTML, without starting the GUI.  Run 'python3 quarkexport.py --help' for usage.
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
+
+#Quark specific
+import settings as quarkSettings
+from quarkrenderer import QuarkRenderer, rendererFingerprint
+from quarkmarkdown import createMarkdown
+
+
+
+#~export settings~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+noteExtensions = (".md", ".markdown")   # extensions replaced by '.html' in the names of exported notes
+manifestName = "manifest.json"          # name of the manifest in the output directory
+assetsName = "assets"                   # name of the directory of shared assets in the output directory
+stylesheetName = "stylesheet.css"
+pygmentsStylesheetName = "pygments.css"
+
+
+
+#~worker process~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+_workerMarkdown = None  # the Markdown engine of a worker process
+_workerTemplate = None  # the head and tail of the HTML template
+
+
+def _initWorker():
+    """Initializes a worker process by creating its own renderer and loading the HTML template."""
+
+    global _workerMarkdown, _workerTemplate
+    _workerMarkdown = createMarkdown(QuarkRenderer(standalone=False))
+    _workerTemplate = (_workerMarkdown.renderer.docTemplateHead, _workerMarkdown.renderer.docFooter)
+
+
+def _exportNote(job):
+    """Renders a note to an HTML file.  'job' is a '(notePath, outputPath, assetsUrl)' tuple, 'assetsUrl'
+being the relative URL of the assets directory from the output file.  Returns 'job', whether the note was
+exported and an error message (or 'None').  Files which are not text (e.g. images stored with the notes)
+are not notes and are ignored."""
+
+    notePath, outputPath, assetsUrl = job
+    try:
+        noteFile = open(notePath, "r", encoding="utf-8")
+        try:
+            text = noteFile.read()
+        except UnicodeDecodeError:
+            return job, False, None
+        finally:
+            noteFile.close()
+
+        head, tail = _workerTemplate
+        head = head.format(stylesheet=stylesheetLink(assetsUrl + "/" + stylesheetName),
+                           pygments_stylesheet=stylesheetLink(assetsUrl + "/" + pygmentsStylesheetName))
+        writeFile(outputPath, head + _workerMarkdown(text) + tail)
+    except OSError as error:
+        return job, False, str(error)
+
+    return job, True, None
+
+
+
+#~helper functions~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def stylesheetLink(url):
+    """Returns the HTML element linking to the stylesheet at 'url'."""
+
+    return "<link rel=\"stylesheet\" type=\"text/css\" href=\"{}\">".format(url)
+
+
+def writeFile(path, text):
+    """Writes 'text' to the file 'path' (creating its directory if needed), replacing the file at once."""
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporaryPath = "{}.{}.tmp".format(path, os.getpid())
+    outputFile = open(temporaryPath, "w", encoding="utf-8")
+    outputFile.write(text)
+    outputFile.close()
+    os.replace(temporaryPath, path)
+
+
+def hashFile(path):
+    """Returns the SHA-1 hash of the content of the file 'path'."""
+
+    noteFile = open(path, "rb")
+    contentHash = hashlib.sha1( noteFile.read() ).hexdigest()
+    noteFile.close()
+    return contentHash
+
+
+def findNotes(notesDir):
+    """Returns the paths (relative to 'notesDir') of all the notes found under 'notesDir', sorted.  As in
+the notes manager, the (non-hidden) files of the notes directory and of its notebooks (sub-directories)
+are notes, and sub-directories of notebooks are ignored."""
+
+    notes = []
+    for item in sorted(os.listdir(notesDir)):
+        itemPath = os.path.join(notesDir, item)
+        if item.startswith("."):
+            continue
+        elif os.path.isfile(itemPath):
+            notes.append(item)
+        elif os.path.isdir(itemPath):
+            notes.extend(os.path.join(item, note) for note in sorted(os.listdir(itemPath))
+                         if not note.startswith(".") and os.path.isfile(os.path.join(itemPath, note)))
+    return notes
+
+
+def outputName(note):
+    """Returns the name of the HTML file a note is exported to."""
+
+    name, extension = os.path.splitext(note)
+    return (name if extension in noteExtensions else note) + ".html"
+
+
+def loadManifest(path):
+    """Returns the manifest stored at 'path' or an empty manifest if there is none (or it is unreadable)."""
+
+    try:
+        manifestFile = open(path, "r", encoding="utf-8")
+        manifest = json.load(manifestFile)
+        manifestFile.close()
+    except (OSError, ValueError):
+        return {"renderer": None, "notes": {}}
+    return manifest
+
+
+
+#~export~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def exportNotes(notesDir, outputDir, processes=0, force=False, verbose=False):
+    """Exports every note under 'notesDir' to an HTML file at the same relative path under 'outputDir'.
+
+The stylesheet and the Pygments stylesheet are written once to the assets directory of 'outputDir' and
+linked to from every note.  The manifest of 'outputDir' records the size, modification time and content
+hash of every exported note, along with the fingerprint of the renderer settings: notes whose content did
+not change (and which were exported with the same settings) are skipped, unless 'force' is set.  HTML files
+of notes that no longer exist are deleted.  The notes are rendered by a pool of 'processes' processes (one
+per processor if 0).  Returns a '(exported, skipped, failed)' tuple with the number of notes of each kind."""
+
+    notesDir = os.path.abspath(os.path.expanduser(notesDir))
+    outputDir = os.path.abspath(os.path.expanduser(outputDir))
+    manifestPath = os.path.join(outputDir, manifestName)
+
+    fingerprint = rendererFingerprint()
+    manifest = loadManifest(manifestPath)
+    if force or manifest.get("renderer") != fingerprint:
+        manifest = {"renderer": fingerprint, "notes": {}}   # every note has to be exported again
+    oldEntries = manifest["notes"]
+
+    # write the shared assets
+    renderer = QuarkRenderer(standalone=False)
+    cssFile = open(quarkSettings.html_template_stylesheet, "r", encoding="utf-8")
+    writeFile(os.path.join(outputDir, assetsName, stylesheetName), cssFile.read())
+    cssFile.close()
+    writeFile(os.path.join(outputDir, assetsName, pygmentsStylesheetName), renderer.formatter.get_style_defs())
+
+    # find the notes which changed since the last export
+    entries = {}
+    jobs = []
+    skipped = 0
+    for note in findNotes(notesDir):
+        notePath = os.path.join(notesDir, note)
+        outputPath = os.path.join(outputDir, outputName(note))
+        status = os.stat(notePath)
+        entry = {"size": status.st_size, "mtime": status.st_mtime}
+
+        oldEntry = oldEntries.get(note)
+        if oldEntry is not None and os.path.exists(outputPath):
+            if oldEntry["size"] == entry["size"] and oldEntry["mtime"] == entry["mtime"]:
+                entries[note] = oldEntry        # not even touched since the last export
+                skipped += 1
+                continue
+            entry["hash"] = hashFile(notePath)
+            if oldEntry["hash"] == entry["hash"]:
+                entries[note] = entry           # touched, but its content is the same
+                skipped += 1
+                continue
+        else:
+            entry["hash"] = hashFile(notePath)
+
+        entries[note] = entry
+        assetsUrl = os.path.relpath(os.path.join(outputDir, assetsName), os.path.dirname(outputPath)).replace(os.sep, "/")
+        jobs.append( (notePath, outputPath, assetsUrl) )
+
+    # render the notes, in parallel
+    exported = 0
+    failed = 0
+    if jobs:
+        processes = processes if processes > 0 else (os.cpu_count() or 1)
+        pool = multiprocessing.Pool(processes, initializer=_initWorker)
+        try:
+            chunkSize = max(1, min(64, len(jobs) // (4 * processes)))  # big enough to amortize the round trips
+            for (notePath, outputPath, assetsUrl), written, error in pool.imap_unordered(_exportNote, jobs, chunkSize):
+                note = os.path.relpath(notePath, notesDir)
+                if error is not None:
+                    print("Could not export '{}': {}".format(note, error))
+                    del entries[note]   # try again next time
+                    failed += 1
+                elif written:
+                    exported += 1
+                    if verbose:
+                        print("Exported '{}'".format(note))
+        finally:
+            pool.close()
+            pool.join()
+
+    # delete the HTML of the notes which were removed
+    for note in oldEntries:
+        if note not in entries and not os.path.exists(os.path.join(notesDir, note)):
+            try:
+                os.remove( os.path.join(outputDir, outputName(note)) )
+            except OSError:
+                pass
+
+    manifest["notes"] = entries
+    writeFile(manifestPath, json.dumps(manifest, indent=1, sort_keys=True))
+    return exported, skipped, failed
+
+
+
+#~command line~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def main(arguments):
+    parser = argparse.ArgumentParser(description="Export all the notes of the notes directory to HTML.")
+    parser.add_argument("-n", "--notes-dir", default=quarkSettings.notes_dir,
+                        help="directory of the notes to export (default: the notes directory)")
+    parser.add_argument("-o", "--output", required=True, help="directory the HTML files are written to")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="number of render processes (default: one per processor)")
+    parser.add_argument("-f", "--force", action="store_true", help="export every note, even the ones which did not change")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the name of every exported note")
+    options = parser.parse_args(arguments)
+
+    start = time.monotonic()
+    exported, skipped, failed = exportNotes(options.notes_dir, options.output, options.jobs, options.force, options.verbose)
+    print("{} notes exported, {} unchanged, {} failed ({:.1f} s)".format(exported, skipped, failed, time.monotonic() - start))
+    return 1 if failed else 0
+
+
+
+if __name__ == "__main__":
+    sys.exit( main(sys.argv[1:]) )
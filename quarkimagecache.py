@@ -0,0 +1,229 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkimagecache.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains the class used to display downscaled copies of the local images
+    of a note in the preview, instead of the full resolution originals.
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import os
+import re
+import html
+import hashlib
+import threading
+
+#Qt objects
+from PyQt5.QtCore import QObject, QThreadPool, QUrl, Qt, pyqtSignal
+from PyQt5.QtGui import QImageReader
+
+#Quark specific
+import quarkExtra
+from quarkrenderworker import FunctionTask
+from quarkdiskcache import evictDirectory
+
+
+
+#~image cache~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+_imageSource = re.compile(r'(<img\b[^>]*?\bsrc=")([^"]*)(")', re.IGNORECASE)
+
+_scalableFormats = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff", ".webp")  # formats worth downscaling
+
+
+class QuarkImageCache(QObject):
+    """A disk cache of downscaled copies of the local images displayed in the preview.
+
+'rewriteBlocks()' replaces the references to local images wider than the preview by references to
+copies scaled down to the width of the preview (rounded up to 'widthStep' pixels), so the preview never
+has to decode and hold full resolution images.  Copies are stored in 'directory' under a hash of the
+path, modification time and size of the original image and of the target width, so they are regenerated
+whenever the original changes.  Missing copies are generated in the background, meanwhile the original
+is displayed; 'imageReady' is emitted when a copy is ready.  When the directory grows over 'maxSize'
+bytes, the least recently used copies are deleted.
+
+Relative image paths are resolved against 'baseDirectory', as they are by the preview."""
+
+    imageReady = pyqtSignal()   # emitted (from a worker thread) when a downscaled image has been generated
+
+    widthStep = 256             # target widths are rounded up to a multiple of this many pixels
+
+    def __init__(self, directory, maxSize, baseDirectory, parent=None):
+        super(QuarkImageCache, self).__init__(parent)
+
+        self.directory = quarkExtra.makeAbsoluteFromHome(directory)
+        self.maxSize = maxSize
+        self.baseDirectory = baseDirectory
+        self.targetWidth = 0                # width (in pixels) of the downscaled images, 0 to leave images alone
+
+        self._lock = threading.Lock()
+        self._sources = {}                  # source to display for every (path, mtime, size, width) seen so far
+        self._pending = set()               # entries being generated
+
+        self._pool = QThreadPool(self)      # images are generated one at a time, so rendering is not slowed down
+        self._pool.setMaxThreadCount(1)
+
+
+    def setTargetWidth(self, width):
+        """Sets the width of the preview, which the downscaled images are sized for."""
+
+        self.targetWidth = ((max(0, width) + self.widthStep - 1) // self.widthStep) * self.widthStep
+
+
+    def rewriteBlocks(self, blocks):
+        """Returns the list of 'KeyedBlock's 'blocks' with their local images replaced by downscaled copies.
+The key of a block changes with the images it references, so the preview picks up the copies once ready."""
+
+        rewrittenBlocks = []
+        for block in blocks:
+            rewrittenHtml = self.rewriteHtml(block.html) if "<img" in block.html else block.html
+            if rewrittenHtml is block.html:
+                rewrittenBlocks.append(block)
+            else:
+                key = "{}-i{}".format(block.key, hashlib.sha1(rewrittenHtml.encode("utf-8")).hexdigest()[:8])
+                rewrittenHtml = rewrittenHtml.replace("data-qk=\"{}\"".format(block.key), "data-qk=\"{}\"".format(key), 1)
+                rewrittenBlocks.append( block._replace(key=key, html=rewrittenHtml) )
+
+        return rewrittenBlocks
+
+
+    def rewriteHtml(self, text):
+        """Returns 'text' with the sources of its local images replaced by downscaled copies, if there are
+any ready.  Returns 'text' itself if nothing was replaced."""
+
+        if self.targetWidth <= 0:
+            return text
+
+        replaced = [False]
+        def replaceSource(match):
+            source = self.scaledSource( html.unescape(match.group(2)) )
+            if source is None:
+                return match.group(0)
+            replaced[0] = True
+            return match.group(1) + html.escape(source) + match.group(3)
+
+        rewrittenText = _imageSource.sub(replaceSource, text)
+        return rewrittenText if replaced[0] else text
+
+
+    def scaledSource(self, source):
+        """Returns the URL of the downscaled copy of the image 'source' (a URL or path), or 'None' if the
+original should be displayed (it is not a local image, it is small enough or its copy is not ready)."""
+
+        path = self.localPath(source)
+        if path is None or not path.lower().endswith(_scalableFormats):
+            return None
+        try:
+            status = os.stat(path)
+        except OSError:
+            return None
+
+        entry = (path, status.st_mtime, status.st_size, self.targetWidth)
+        cachePath = self.entryPath(entry)
+        with self._lock:
+            if entry in self._sources and (self._sources[entry] is None or os.path.exists(cachePath)):
+                return self._sources[entry]     # (unless the copy was evicted since)
+            if entry in self._pending:
+                return None
+
+        if os.path.exists(cachePath):
+            os.utime(cachePath, None)       # mark the copy as recently used
+            scaledSource = QUrl.fromLocalFile(cachePath).toString()
+            with self._lock:
+                self._sources[entry] = scaledSource
+            return scaledSource
+
+        with self._lock:
+            self._pending.add(entry)
+        self._pool.start( FunctionTask(self._generate, entry, cachePath) )
+        return None
+
+
+    def localPath(self, source):
+        """Returns the absolute path of the image 'source' if it is a local file, 'None' otherwise."""
+
+        url = QUrl(source)
+        if url.isLocalFile():
+            return url.toLocalFile()
+        if url.scheme() != "" and not (len(url.scheme()) == 1 and os.name == "nt"):  # e.g. 'http:', but not 'C:'
+            return None
+        return os.path.normpath( os.path.join(self.baseDirectory, os.path.expanduser(source)) )
+
+
+    def entryPath(self, entry):
+        """Returns the path of the downscaled copy for the '(path, mtime, size, width)' tuple 'entry'."""
+
+        key = "\0".join(str(part) for part in entry)
+        extension = ".jpg" if entry[0].lower().endswith((".jpg", ".jpeg")) else ".png"  # keep transparency
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + extension)
+
+
+    def _generate(self, entry, cachePath):
+        """Generates the downscaled copy of an image (in a worker thread)."""
+
+        path, mtime, size, width = entry
+        scaledSource = None     # if the image cannot or need not be downscaled, the original is displayed
+        try:
+            reader = QImageReader(path)
+            originalSize = reader.size()    # read from the header, the image itself is not decoded
+            if originalSize.isValid() and originalSize.width() > width:
+                # let the reader decode the image at the smaller size (much faster for some formats, e.g. JPEG)
+                reader.setScaledSize( originalSize.scaled(width, originalSize.height(), Qt.KeepAspectRatio) )
+                image = reader.read()
+                if not image.isNull():
+                    os.makedirs(self.directory, exist_ok=True)
+                    temporaryPath = "{}.{}.tmp".format(cachePath, threading.get_ident())
+                    if image.save(temporaryPath, "JPG" if cachePath.endswith(".jpg") else "PNG"):
+                        os.replace(temporaryPath, cachePath)    # never leave a partially written copy behind
+                        scaledSource = QUrl.fromLocalFile(cachePath).toString()
+                        evictDirectory(self.directory, self.maxSize, (".jpg", ".png"))
+        finally:
+            with self._lock:
+                self._pending.discard(entry)
+                self._sources[entry] = scaledSource
+
+        if scaledSource is not None:
+            self.imageReady.emit()
+
+
+    def shutdown(self):
+        """Drops the images waiting to be generated and waits for the current one."""
+
+        self._pool.clear()
+        self._pool.waitForDone()
@@ -0,0 +1,199 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkmarkdown.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains the Markdown engines (backends) which can be used to render
+    notes.  Every engine renders through the hooks of 'QuarkRenderer' (code highlighting,
+    math, document header and footer), so notes look the same whichever engine is used.
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import re
+from abc import ABC, abstractmethod
+
+#extra modules
+import misaka
+
+try:    # Python-Markdown is optional, it is only needed by the "python-markdown" engine
+    import markdown as pythonMarkdown
+    from markdown.extensions import Extension as _Extension
+    from markdown.preprocessors import Preprocessor as _Preprocessor
+    from markdown.inlinepatterns import InlineProcessor as _InlineProcessor
+except ImportError:
+    pythonMarkdown = None
+    _Extension = _Preprocessor = _InlineProcessor = object
+
+#Quark specific
+import settings as quarkSettings
+from quarkrenderer import markdownExtensions
+
+
+
+#~engine interface~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class MarkdownEngine(ABC):
+    """Base class of the Markdown engines.
+
+An engine is created with a 'QuarkRenderer' and, when called with the Markdown source of a note (or of
+a part of it), returns its HTML.  The renderer's hooks must be used for code blocks, math and the document
+header and footer, so its settings (e.g. 'standalone' and 'deferHighlighting') apply to every engine."""
+
+    name = None         # name of the engine, as used in the 'markdown_engine' setting
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+
+    @abstractmethod
+    def __call__(self, text):
+        """Returns the HTML of the Markdown source 'text'."""
+
+    @classmethod
+    def isAvailable(cls):
+        """Returns True if the modules needed by the engine are installed."""
+
+        return True
+
+
+
+#~misaka engine~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class MisakaEngine(MarkdownEngine):
+    """Renders Markdown using Misaka, a binding for the Hoedown C library (the default engine).
+'QuarkRenderer' is a Misaka renderer, so its hooks are called by Hoedown directly."""
+
+    name = "misaka"
+
+    def __init__(self, renderer):
+        super(MisakaEngine, self).__init__(renderer)
+        self.markdown = misaka.Markdown(renderer, extensions=markdownExtensions)
+
+    def __call__(self, text):
+        return self.markdown(text)
+
+
+
+#~Python-Markdown engine~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class _FencedCodePreprocessor(_Preprocessor):
+    """Replaces fenced code blocks by the HTML of 'QuarkRenderer.blockcode()' (stashed, so it is left alone)."""
+
+    fencedBlock = re.compile(r"(?P<fence>^(?:~{3,}|`{3,}))[ ]*(?P<lang>[\w#.+-]*)[^\n]*\n(?P<code>.*?)(?<=\n)(?P=fence)[ ]*$",
+                             re.MULTILINE | re.DOTALL)
+
+    def __init__(self, md, renderer):
+        super(_FencedCodePreprocessor, self).__init__(md)
+        self.renderer = renderer
+
+    def run(self, lines):
+        def replaceBlock(match):
+            html = self.renderer.blockcode(match.group("code"), match.group("lang"))
+            return "\n\n{}\n\n".format(self.md.htmlStash.store(html))
+
+        return self.fencedBlock.sub(replaceBlock, "\n".join(lines)).split("\n")
+
+
+class _MathInlineProcessor(_InlineProcessor):
+    """Replaces '$$...$$' (display) and '$...$' (inline) math by the HTML of 'QuarkRenderer.math()'."""
+
+    def __init__(self, md, renderer):
+        super(_MathInlineProcessor, self).__init__(r"(?<!\\)(\$\$?)(.+?)(?<!\\)\1", md)
+        self.renderer = renderer
+
+    def handleMatch(self, match, data):
+        html = self.renderer.math(match.group(2), len(match.group(1)) == 2)
+        return self.md.htmlStash.store(html), match.start(0), match.end(0)
+
+
+class _QuarkExtension(_Extension):
+    """Python-Markdown extension which renders code blocks and math using the hooks of a 'QuarkRenderer'."""
+
+    def __init__(self, renderer):
+        super(_QuarkExtension, self).__init__()
+        self.renderer = renderer
+
+    def extendMarkdown(self, md):
+        # fenced code is handled before the built-in preprocessors, math before backslash escapes and emphasis
+        md.preprocessors.register(_FencedCodePreprocessor(md, self.renderer), "quark_fenced_code", 30)
+        md.inlinePatterns.register(_MathInlineProcessor(md, self.renderer), "quark_math", 185)
+
+
+class PythonMarkdownEngine(MarkdownEngine):
+    """Renders Markdown using Python-Markdown (pure Python), with the tables extension.  Fenced code blocks
+and math are rendered by the renderer's hooks; indented code blocks are left to Python-Markdown."""
+
+    name = "python-markdown"
+
+    def __init__(self, renderer):
+        super(PythonMarkdownEngine, self).__init__(renderer)
+        self.markdown = pythonMarkdown.Markdown(extensions=["tables", _QuarkExtension(renderer)])
+
+    def __call__(self, text):
+        self.markdown.reset()   # forget the state (e.g. stashed HTML) of the previous render
+        html = self.markdown.convert(text)
+        return self.renderer.doc_header(False) + html + "\n" + self.renderer.doc_footer(False)
+
+    @classmethod
+    def isAvailable(cls):
+        return pythonMarkdown is not None
+
+
+
+#~engine selection~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# the Markdown engines, by name
+engines = dict( (engine.name, engine) for engine in (MisakaEngine, PythonMarkdownEngine) )
+
+
+def availableEngines():
+    """Returns the (sorted) names of the engines which can be used."""
+
+    return sorted(name for name, engine in engines.items() if engine.isAvailable())
+
+
+def createMarkdown(renderer, engineName=None):
+    """Returns a Markdown engine rendering through 'renderer'.  The engine is selected by 'engineName' or,
+by default, by the 'markdown_engine' setting.  Falls back to Misaka if the engine cannot be used."""
+
+    if engineName is None:
+        engineName = quarkSettings.markdown_engine
+
+    engine = engines.get(engineName)
+    if engine is None or not engine.isAvailable():
+        print("Markdown engine '{}' is not available, using '{}' instead.".format(engineName, MisakaEngine.name))
+        engine = MisakaEngine
+
+    return engine(renderer)
@@ -0,0 +1,205 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkmetrics.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains the always-on performance metrics of Quark: rolling latency
+    histograms (e.g. from a keystroke to the updated preview) which can be shown in the
+    status bar and are periodically written to a metrics file.
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import os
+import json
+import time
+import bisect
+import socket
+import platform
+import threading
+
+
+
+#~histogram~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# upper bounds (in milliseconds) of the histogram buckets, 25% apart, from 0.05 ms to about 100 s
+bucketBounds = [0.05 * 1.25 ** i for i in range(66)]
+
+
+class LatencyHistogram(object):
+    """A histogram of durations (in milliseconds) with logarithmic buckets.  Recording a value is O(log n)
+and uses no memory, percentiles are accurate to a bucket (25%).  Not thread safe, see 'QuarkMetrics'."""
+
+    def __init__(self):
+        self.counts = [0] * (len(bucketBounds) + 1)     # the last bucket holds everything bigger
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def record(self, milliseconds):
+        self.counts[bisect.bisect_left(bucketBounds, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.maximum = max(self.maximum, milliseconds)
+
+    def merge(self, other):
+        """Adds the values of the histogram 'other' to this one."""
+
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    def percentile(self, p):
+        """Returns (an upper bound of) the 'p'th percentile of the values, or 'None' if there are none."""
+
+        if self.count == 0:
+            return None
+        rank = p / 100.0 * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count > 0:
+                return min(bucketBounds[i], self.maximum) if i < len(bucketBounds) else self.maximum
+        return self.maximum
+
+    def summary(self):
+        """Returns the statistics of the histogram as a dictionary (with its non-empty buckets)."""
+
+        return {"count": self.count,
+                "mean": self.total / self.count if self.count else None,
+                "p50": self.percentile(50),
+                "p90": self.percentile(90),
+                "p99": self.percentile(99),
+                "max": self.maximum,
+                "buckets": dict( ("{:.3g}".format(bucketBounds[i]) if i < len(bucketBounds) else "inf", count)
+                                 for i, count in enumerate(self.counts) if count )}
+
+
+
+#~metrics~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def buildId():
+    """Returns the Git commit Quark is running from, or 'None' if it is unknown."""
+
+    gitDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".git")
+    try:
+        headFile = open(os.path.join(gitDir, "HEAD"), "r")
+        head = headFile.read().strip()
+        headFile.close()
+        if head.startswith("ref: "):
+            refFile = open(os.path.join(gitDir, head[5:]), "r")
+            head = refFile.read().strip()
+            refFile.close()
+    except OSError:
+        return None
+    return head[:12]
+
+
+class QuarkMetrics(object):
+    """Rolling histograms of named durations (e.g. "preview latency"), recorded from any thread.
+
+Values are recorded in the histograms of the current interval.  'roll()' ends the interval: it returns the
+summary of its histograms and starts a new one.  Percentiles (see 'percentiles()') are computed over the
+current and the previous interval, so they always reflect recent use."""
+
+    def __init__(self):
+        self._current = {}      # histograms of the current interval, by name
+        self._previous = {}     # histograms of the previous interval, by name
+        self._intervalStart = time.time()
+        self._lock = threading.Lock()
+
+
+    def record(self, name, milliseconds):
+        """Records a duration (in milliseconds) in the histogram 'name'."""
+
+        with self._lock:
+            histogram = self._current.get(name)
+            if histogram is None:
+                histogram = self._current[name] = LatencyHistogram()
+            histogram.record(milliseconds)
+
+
+    def percentiles(self, name, ps=(50, 99)):
+        """Returns the 'ps' percentiles of the recent durations 'name', as a list ('None's if there are none)."""
+
+        with self._lock:
+            histogram = LatencyHistogram()
+            for histograms in (self._previous, self._current):
+                if name in histograms:
+                    histogram.merge(histograms[name])
+        return [histogram.percentile(p) for p in ps]
+
+
+    def roll(self):
+        """Ends the current interval and returns a dictionary describing it (with the summaries of its
+histograms), or 'None' if nothing was recorded during the interval."""
+
+        with self._lock:
+            current, self._previous, self._current = self._current, self._current, {}
+            start, self._intervalStart = self._intervalStart, time.time()
+
+        if not current:
+            return None
+        return {"start": start,
+                "end": self._intervalStart,
+                "metrics": dict( (name, histogram.summary()) for name, histogram in current.items() )}
+
+
+    def dump(self, path):
+        """Ends the current interval and appends it to the metrics file 'path' (one JSON object per line),
+along with what identifies the build and the machine.  Does nothing if nothing was recorded."""
+
+        interval = self.roll()
+        if interval is None:
+            return
+
+        interval["build"] = buildId()
+        interval["host"] = socket.gethostname()
+        interval["platform"] = platform.platform()
+        interval["python"] = platform.python_version()
+        interval["pid"] = os.getpid()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            metricsFile = open(path, "a")
+            metricsFile.write(json.dumps(interval, sort_keys=True) + "\n")
+            metricsFile.close()
+        except OSError as error:
+            print("Could not write the metrics file: ", error)
+
+
+
+# the metrics of the application
+metrics = QuarkMetrics()
@@ -0,0 +1,242 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkpreview.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains the class wich defines the note preview widget.
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import os
+import json
+
+#Qt objects
+from PyQt5.QtCore import QObject, QUrl, pyqtSignal, pyqtSlot
+from PyQt5.QtWebKitWidgets import QWebView, QWebPage
+
+#Quark specific
+import settings as quarkSettings
+from quarktrace import tracer
+from quarkblockrenderer import diffBlocks
+
+
+
+#~preview bridge~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class QuarkPreviewBridge(QObject):
+    """Object exposed to the preview page (as 'quarkBridge') so the preview script can notify Quark of
+what happens in the page."""
+
+    placeholderVisible = pyqtSignal(int)    # emitted with the first line of a placeholder block scrolled into view
+    scrolled = pyqtSignal(float)            # emitted with the (fractional) source line at the top of the scrolled preview
+    typeset = pyqtSignal()                  # emitted when MathJax is done typesetting (only while tracing)
+
+    @pyqtSlot(int)
+    def showPlaceholder(self, line):
+        """Called by the preview script when a placeholder block starting at 'line' is scrolled into view."""
+
+        self.placeholderVisible.emit(line)
+
+    @pyqtSlot(float)
+    def scrolledToLine(self, line):
+        """Called by the preview script when the user scrolls the preview, with the source line now at the top."""
+
+        self.scrolled.emit(line)
+
+    @pyqtSlot()
+    def mathTypeset(self):
+        """Called by the preview script when MathJax is done typesetting, if it was asked to (see 'setTracing()')."""
+
+        self.typeset.emit()
+
+
+
+#~note preview~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class QuarkPreview(QWebView):
+    """The widget used to display the rendered note.
+
+If 'persistent_preview' is set, a "shell" page made of the document header and footer is loaded
+only once.  The stylesheets and MathJax are therefore only parsed and started once, and later
+updates only patch the content of the note using the functions defined in the preview script.
+The note is displayed as a sequence of keyed blocks (see 'QuarkBlockRenderer.renderKeyedBlocks()'),
+so only the keys of the removed blocks, the blocks which are new or changed and the lines of the blocks
+which moved are sent to the page (see 'diffBlocks()'), everything else is left untouched.
+The page also caches the typeset output of every math expression, so only new expressions are sent
+to MathJax.  If 'lazy_math' is set, only the math close to the visible area is typeset right away, the
+rest shows its TeX source until it is scrolled into view or typeset in the background.
+Otherwise, the whole document is reloaded on every update.
+
+Blocks of very long notes may be placeholders (see 'KeyedBlock'); when one is scrolled into view, the
+bridge's 'placeholderVisible' signal is emitted so the block can be rendered.
+
+Every block is anchored to its source lines, so the page can map source lines to offsets and back by a
+binary search in an index of the blocks, measured after the layout changes.  'scrollToLine()' uses it to
+scroll the preview to a line of the note and the bridge's 'scrolled' signal tells which line is at the
+top when the user scrolls the preview."""
+
+    def __init__(self, docHeader, docFooter, parent):
+        super(QuarkPreview, self).__init__(parent)
+
+        self.page().setLinkDelegationPolicy(QWebPage.DelegateExternalLinks)
+
+        self.docHeader = docHeader          # head of the HTML document (up to the opening <body> tag)
+        self.docFooter = docFooter          # tail of the HTML document (from the closing </body> tag)
+        self.persistent = quarkSettings.persistent_preview
+
+        self._shellLoaded = False           # whether the shell page is ready to receive content
+        self._shellLoading = False          # whether the shell page is being loaded
+        self._pendingBlocks = None          # blocks received before the shell was ready
+        self._blocks = []                   # blocks currently displayed in the shell
+
+        # the base URL used to resolve relative paths (e.g. to MathJax) in the document
+        self.baseUrl = QUrl("file://" + os.getcwd() + "/" + quarkSettings.start_html_template_file)
+
+        # expose the bridge to the page every time a new page is loaded
+        self.bridge = QuarkPreviewBridge(self)
+        self.page().mainFrame().javaScriptWindowObjectCleared.connect(self._addBridge)
+
+        # the stages which end in the page are traced from the moment the content was sent to it
+        self._contentSentTime = 0.0
+        self.loadFinished.connect(self._traceLoadFinished)
+        self.bridge.typeset.connect(self._traceTypeset)
+
+        if self.persistent:
+            self.loadFinished.connect(self._shellLoadFinished)
+            self.loadShell()
+
+
+    def loadShell(self):
+        """(Re)loads the shell page.  Content set before the page is ready is displayed once it is loaded."""
+
+        scriptFile = open(quarkSettings.preview_script_file, "r")
+        script = scriptFile.read()
+        scriptFile.close()
+
+        shell = "{header}\n<div id=\"quark-content\"></div>\n<script type=\"text/javascript\">\n{script}\n</script>\n{footer}".format(
+                    header=self.docHeader, script=script, footer=self.docFooter)
+
+        self._shellLoaded = False
+        self._shellLoading = True
+        self._blocks = []
+        self._contentSentTime = tracer.now()
+        with tracer.span("setHtml", category="preview", shell=True):
+            self.setHtml(shell, self.baseUrl)
+
+
+    def setBlocks(self, blocks):
+        """Displays the rendered note given as a list of 'KeyedBlock's (see 'QuarkBlockRenderer.renderKeyedBlocks()')."""
+
+        if not self.persistent:
+            self._contentSentTime = tracer.now()
+            with tracer.span("setHtml", category="preview", blocks=len(blocks)):
+                self.setHtml(self.docHeader + "".join(block.html for block in blocks) + self.docFooter, self.baseUrl)
+        elif not self._shellLoaded:
+            self._pendingBlocks = blocks
+            if not self._shellLoading:  # the user navigated away from the shell (e.g. by following a link)
+                self.loadShell()
+        else:
+            # only send what changed since the blocks the page already has
+            removed, inserted, moved = diffBlocks(self._blocks, blocks)
+            self._contentSentTime = tracer.now()
+            with tracer.span("patch", category="preview", blocks=len(blocks), changed=len(inserted)):
+                self.callScript("quark.patch", removed, inserted, moved)
+            self._blocks = blocks
+
+
+    def isReady(self):
+        """Returns True if the preview can display content right away (i.e. the shell page is loaded)."""
+
+        return not self.persistent or self._shellLoaded
+
+
+    def scrollToLine(self, line):
+        """Scrolls the preview so the (fractional) source line 'line' is at the top.  Returns False if the
+preview cannot map lines to offsets (i.e. it is not persistent or not loaded yet)."""
+
+        if not self._shellLoaded:
+            return False
+        self.callScript("quark.scrollToLine", line)
+        return True
+
+
+    def setTracing(self, enabled):
+        """Tells the page whether to notify Quark when MathJax is done, so it can be traced."""
+
+        if self._shellLoaded:
+            self.callScript("quark.setOptions", {"trace": enabled})
+
+
+    def callScript(self, function, *args):
+        """Calls the function 'function' of the preview script with the arguments 'args' (which are
+converted to JSON) and returns the result."""
+
+        arguments = ", ".join(json.dumps(a) for a in args)
+        return self.page().mainFrame().evaluateJavaScript("{}({})".format(function, arguments))
+
+
+    def _shellLoadFinished(self, ok):
+        """Slot called when the shell page is loaded.  Displays any content received while loading."""
+
+        # any page other than the shell does not define the preview script
+        self._shellLoading = False
+        self._shellLoaded = ok and self.page().mainFrame().evaluateJavaScript("typeof quark") == "object"
+        self._blocks = []
+        if self._shellLoaded:
+            self.callScript("quark.setOptions", {"mathCacheSize": int(quarkSettings.math_cache_size),
+                                                 "lazyMath": bool(quarkSettings.lazy_math),
+                                                 "trace": tracer.enabled})
+        if self._shellLoaded and self._pendingBlocks is not None:
+            blocks = self._pendingBlocks
+            self._pendingBlocks = None
+            self.setBlocks(blocks)
+
+
+    def _addBridge(self):
+        """Slot called when a new page is about to be loaded.  Makes the bridge available to its scripts."""
+
+        self.page().mainFrame().addToJavaScriptWindowObject("quarkBridge", self.bridge)
+
+
+    def _traceLoadFinished(self, ok):
+        """Slot called when WebKit is done loading a page.  Traces the load."""
+
+        tracer.complete("WebKit load", self._contentSentTime, category="webkit", ok=ok)
+
+
+    def _traceTypeset(self):
+        """Slot called when MathJax is done typesetting.  Traces the typesetting, from when the content was sent."""
+
+        tracer.complete("MathJax typeset", self._contentSentTime, category="mathjax")
@@ -0,0 +1,198 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkprocessrenderer.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains a block renderer which renders notes using a pool of processes.
+    Pygments and the Python parts of the renderer hold the GIL, so rendering in threads
+    does not use more than one core; separate processes do.
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import os
+import sys
+import multiprocessing
+from multiprocessing import shared_memory
+
+#Quark specific
+import settings as quarkSettings
+from quarkrenderer import QuarkRenderer
+from quarkblockrenderer import QuarkBlockRenderer, renderBlock
+from quarkmarkdown import createMarkdown
+from quarktrace import tracer
+
+
+
+#~worker process~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+_workerMarkdown = None  # the Markdown parser of a worker process
+
+
+def _initWorker(engineName):
+    """Initializes a worker process by creating its own renderer, using the Markdown engine 'engineName'."""
+
+    global _workerMarkdown
+    _workerMarkdown = createMarkdown(QuarkRenderer(standalone=False), engineName)
+
+
+def _readSharedBlocks(name, spans):
+    """Returns the blocks stored at the '(offset, length)' spans of the shared memory block 'name'."""
+
+    # the parent process owns the memory and unlinks it.  Before Python 3.13, attaching to it registers
+    # it again with the resource tracker shared with the parent, which is harmless (and keeps the
+    # parent's registration, so the memory is still released if the parent dies)
+    if sys.version_info >= (3, 13):
+        sharedBlock = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        sharedBlock = shared_memory.SharedMemory(name=name)
+
+    try:
+        return [bytes(sharedBlock.buf[offset:offset + length]).decode("utf-8") for offset, length in spans]
+    finally:
+        sharedBlock.close()
+
+
+def _renderChunk(job):
+    """Renders a chunk of blocks in a worker process and returns the list of their '(html, provisional)'
+tuples (see 'renderBlock()').  'job' is a '(deferHighlighting, chunk)' tuple, where 'chunk' is either
+'("text", blockTexts)' or '("shared", memoryName, spans)' for blocks passed in shared memory."""
+
+    deferHighlighting, chunk = job
+    if chunk[0] == "shared":
+        blockTexts = _readSharedBlocks(chunk[1], chunk[2])
+    else:
+        blockTexts = chunk[1]
+
+    _workerMarkdown.renderer.deferHighlighting = deferHighlighting
+    try:
+        return [renderBlock(_workerMarkdown, text) for text in blockTexts]
+    finally:
+        _workerMarkdown.renderer.deferHighlighting = False
+
+
+
+#~process renderer~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class QuarkProcessRenderer(QuarkBlockRenderer):
+    """A block renderer which renders the blocks of a note in a pool of worker processes.
+
+The blocks which are not in the cache are split in roughly equal chunks, one per process, so independent
+blocks (e.g. code blocks which have to be highlighted) are rendered in parallel.  If the blocks add up to
+more than 'render_shared_memory_threshold' bytes, they are passed to the workers through shared memory
+instead of being pickled.  Small renders are not worth the round trip and are done in the calling thread.
+
+The pool is persistent: it is created on the first render that needs it and released by 'close()'."""
+
+    def __init__(self, processes=0, engineName=None):
+        super(QuarkProcessRenderer, self).__init__(engineName)
+
+        self.processes = processes if processes > 0 else (os.cpu_count() or 1)
+        self._pool = None
+
+
+    def renderMissingBlocks(self, blockTexts, deferHighlighting=False):
+        """Renders the blocks which are not in the cache, in the process pool if there is enough work."""
+
+        encodedBlocks = [text.encode("utf-8") for text in blockTexts]
+        totalSize = sum(len(b) for b in encodedBlocks)
+        if len(blockTexts) < 2 or totalSize < quarkSettings.process_pool_min_size:
+            return super(QuarkProcessRenderer, self).renderMissingBlocks(blockTexts, deferHighlighting)
+
+        chunks = self._splitChunks(encodedBlocks)
+
+        sharedBlock = None
+        if totalSize >= quarkSettings.render_shared_memory_threshold:
+            # copy all the blocks into a single shared memory block and only send their positions
+            sharedBlock = shared_memory.SharedMemory(create=True, size=totalSize)
+            offsets = []
+            offset = 0
+            for b in encodedBlocks:
+                sharedBlock.buf[offset:offset + len(b)] = b
+                offsets.append(offset)
+                offset += len(b)
+            jobs = [(deferHighlighting, ("shared", sharedBlock.name, [(offsets[i], len(encodedBlocks[i])) for i in chunk])) for chunk in chunks]
+        else:
+            jobs = [(deferHighlighting, ("text", [blockTexts[i] for i in chunk])) for chunk in chunks]
+
+        try:
+            with tracer.span("markdown (processes)", engine=self.markdown.name, blocks=len(blockTexts), chunks=len(chunks)):
+                results = self._getPool().map(_renderChunk, jobs)
+        finally:
+            if sharedBlock is not None:
+                sharedBlock.close()
+                sharedBlock.unlink()
+
+        # put the results back in the order of the blocks
+        rendered = [None] * len(blockTexts)
+        for chunk, chunkResults in zip(chunks, results):
+            for i, result in zip(chunk, chunkResults):
+                rendered[i] = result
+        return rendered
+
+
+    def close(self):
+        """Terminates the worker processes."""
+
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+
+    def _getPool(self):
+        """Returns the process pool, creating it if needed."""
+
+        if self._pool is None:
+            # worker processes are spawned (not forked) since forking a process running Qt threads is unsafe
+            context = multiprocessing.get_context("spawn")
+            self._pool = context.Pool(self.processes, initializer=_initWorker, initargs=(self.markdown.name,))
+        return self._pool
+
+
+    def _splitChunks(self, encodedBlocks):
+        """Splits the blocks into at most one chunk per process, with roughly equal total sizes.  Returns
+a list of chunks, each one being a list of block indexes."""
+
+        chunkCount = min(self.processes, len(encodedBlocks))
+        chunks = [[] for i in range(chunkCount)]
+        chunkSizes = [0] * chunkCount
+
+        # assign the biggest blocks first, each one to the least loaded chunk
+        for i in sorted(range(len(encodedBlocks)), key=lambda i: len(encodedBlocks[i]), reverse=True):
+            smallest = chunkSizes.index(min(chunkSizes))
+            chunks[smallest].append(i)
+            chunkSizes[smallest] += len(encodedBlocks[i])
+
+        return [chunk for chunk in chunks if chunk]
@@ -0,0 +1,146 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkprofiler.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains a sampling profiler which periodically records the Python stack
+    of every thread of Quark.  Profiles are written as collapsed stacks, which can be
+    turned into flame graphs (e.g. with flamegraph.pl or https://www.speedscope.app).
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import os
+import sys
+import threading
+
+#Quark specific
+import settings as quarkSettings
+
+
+
+#~profiler~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def frameName(frame):
+    """Returns the name of a stack frame in a collapsed stack, e.g. 'highlighter.py:Highlighter.highlighMarkdown'."""
+
+    code = frame.f_code
+    return "{}:{}".format(os.path.basename(code.co_filename), getattr(code, "co_qualname", code.co_name))
+
+
+class QuarkProfiler(object):
+    """A sampling profiler.  While running, a background thread records the Python stack of every other
+thread every 'interval' seconds and counts how many times each stack was seen.
+
+Time spent in Qt (or any other C code) is attributed to the Python function which called it: e.g. laying
+out the text of a note appears under 'NoteEditor.openFileRequest', and the time the GUI thread spends in the
+Qt event loop (idle, painting, handling input...) under the module which started the application."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.sampleCount = 0
+        self._stacks = {}               # number of samples of each collapsed stack
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+
+    def isRunning(self):
+        """Returns True if the profiler is recording samples."""
+
+        return self._thread is not None
+
+
+    def start(self):
+        """Discards the previous samples and starts recording new ones."""
+
+        if self._thread is not None:
+            return
+        with self._lock:
+            self._stacks = {}
+            self.sampleCount = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="Quark profiler", daemon=True)
+        self._thread.start()
+
+
+    def stop(self):
+        """Stops recording samples (they are kept until the profiler is started again)."""
+
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+
+    def write(self, path):
+        """Writes the samples to 'path' as collapsed stacks: one line per stack, with the thread name and
+the frames from the outermost to the innermost separated by ';', followed by the number of samples."""
+
+        with self._lock:
+            stacks = sorted(self._stacks.items())
+
+        profileFile = open(path, "w")
+        for stack, count in stacks:
+            profileFile.write("{} {}\n".format(stack, count))
+        profileFile.close()
+
+
+    def _run(self):
+        ownId = threading.get_ident()
+        mainId = threading.main_thread().ident
+        while not self._stop.wait(self.interval):
+            threadNames = dict( (thread.ident, thread.name) for thread in threading.enumerate() )
+            threadNames[mainId] = "GUI thread"
+            samples = []
+            for threadId, frame in sys._current_frames().items():
+                if threadId == ownId:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(frameName(frame))
+                    frame = frame.f_back
+                frames.append( threadNames.get(threadId, "thread {}".format(threadId)) )
+                samples.append( ";".join(reversed(frames)) )
+
+            with self._lock:
+                for stack in samples:
+                    self._stacks[stack] = self._stacks.get(stack, 0) + 1
+                self.sampleCount += 1
+
+
+
+# the profiler of the application
+profiler = QuarkProfiler(int(quarkSettings.profiler_interval) / 1000.0)
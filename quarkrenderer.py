@@ -38,13 +38,72 @@ License:
 
 #~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+#python modules
+import time
+import hashlib
+from html import escape as escapeHtml
+
+#extra modules
 import misaka
 from pygments import highlight
 from pygments.formatters import HtmlFormatter
 from pygments.lexers import get_lexer_by_name
 from pygments.styles import get_style_by_name
+from pygments.util import ClassNotFound
 
+#Quark specific
 import settings as quarkSettings
+from quarkcache import LRUCache
+from quarktrace import tracer
+from quarkmetrics import metrics
+
+
+
+#~renderer settings~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# the Misaka (Hoedown) extensions used to parse notes
+markdownExtensions = misaka.EXT_FENCED_CODE | misaka.EXT_MATH | misaka.EXT_MATH_EXPLICIT | misaka.EXT_TABLES
+
+
+
+def rendererFingerprint():
+    """Returns a hash of everything, besides the note itself, that affects the rendered HTML: the template
+files, the stylesheet, the Pygments style, the Markdown engine and the Misaka extensions."""
+
+    fingerprint = hashlib.sha1()
+    fingerprint.update( "{}\0{}\0{}\0".format(quarkSettings.pygments_style, quarkSettings.markdown_engine, markdownExtensions).encode("utf-8") )
+    for path in (quarkSettings.start_html_template_file, quarkSettings.end_html_template_file, quarkSettings.html_template_stylesheet):
+        templateFile = open(path, "rb")
+        fingerprint.update( templateFile.read() )
+        templateFile.close()
+        fingerprint.update(b"\0")
+
+    return fingerprint.hexdigest()
+
+
+
+#~highlighting caches~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# highlighted code blocks, keyed by '(language, hash of the code, Pygments style)'
+highlightCache = LRUCache(quarkSettings.highlight_cache_size)
+
+# lexers by language name ('None' if Pygments does not know the language); the names come from the
+# notes, so only the most recently used ones are kept
+_lexerCache = LRUCache(64)
+_noLexer = object()     # marks the languages which are not in the lexer cache
+
+
+def getLexer(lang):
+    """Returns a (cached) Pygments lexer for the language 'lang' or 'None' if no lexer exists for it."""
+
+    lexer = _lexerCache.get(lang, _noLexer)
+    if lexer is _noLexer:
+        try:
+            lexer = get_lexer_by_name(lang, stripall=False)
+        except ClassNotFound:
+            lexer = None
+        _lexerCache.put(lang, lexer)
+    return lexer
 
 
 
@@ -53,14 +112,20 @@ import settings as quarkSettings
 class QuarkRenderer(misaka.HtmlRenderer):
     """A Markdown to HTML renderer for Quark.
 
-This renderer is intended to work with the Misaka module, a python binding for Hoedown."""
+This renderer is intended to work with the Misaka module, a python binding for Hoedown.  If 'standalone'
+is False, the document header and footer are not emitted, so the renderer can be used to render fragments
+of a note (see 'QuarkBlockRenderer')."""
 
-    def __init__(self):
+    def __init__(self, standalone=True):
         super(QuarkRenderer, self).__init__()
 
+        self.standalone = standalone    # whether to wrap the rendered HTML with the document header and footer
+        self.deferHighlighting = False  # whether to skip highlighting long code blocks (see 'blockcode()')
+        self.deferredBlocks = 0         # number of code blocks whose highlighting was skipped so far
+
         # get the document header and footer
         htmlFile = open(quarkSettings.start_html_template_file , "r")   # get the head of the HTML template document
-        self.docHeader = htmlFile.read()
+        self.docTemplateHead = htmlFile.read()                          # (with its '{stylesheet}' and '{pygments_stylesheet}' fields)
         htmlFile.close()
 
         htmlFile = open(quarkSettings.end_html_template_file, "r")      # get the tail of the HTML template document
@@ -68,30 +133,69 @@ This renderer is intended to work with the Misaka module, a python binding for H
         htmlFile.close()
 
         # create a formater
-        self.formatter = HtmlFormatter(style=quarkSettings.pygments_style, cssclass="highlight")    # format the text into HTML
+        self.styleName = quarkSettings.pygments_style
+        self.formatter = HtmlFormatter(style=self.styleName, cssclass="highlight")    # format the text into HTML
 
         # fill in the document header
         cssFile = open(quarkSettings.html_template_stylesheet, "r")
         css = cssFile.read()
         cssFile.close()
-        self.docHeader = self.docHeader.format(stylesheet="<style>\n{}\n</style>".format(css),
-                                               pygments_stylesheet="<style>\n{}\n</style>".format(self.formatter.get_style_defs()))
+        self.docHeader = self.docTemplateHead.format(stylesheet="<style>\n{}\n</style>".format(css),
+                                                     pygments_stylesheet="<style>\n{}\n</style>".format(self.formatter.get_style_defs()))
 
     # override code block rendering
     def blockcode(self, text, lang):
-        """Given a codeblock, generates the HTLM code to pretty-print using a parser for the specified language."""
+        """Given a codeblock, generates the HTLM code to pretty-print using a parser for the specified language.
+Highlighted blocks are cached, so unchanged blocks are only highlighted once.
+
+If 'deferHighlighting' is set, long code blocks which are not in the cache are not highlighted.  A plain
+code block is returned instead and 'deferredBlocks' is incremented, so the caller knows the block has to
+be rendered again (without deferring) to get the highlighted version."""
 
         if not lang:
             # if no language is specified, simply return the text as a plain code block
-            return "<div class='highlight'><pre>{}</pre></div>".format(text)
-        else:
-            lexer = get_lexer_by_name(lang, stripall=False) # lexer for the specified language
-            return highlight(text, lexer, self.formatter)   # return the formated text
+            return self.plainBlockcode(text)
+
+        key = (lang, hashlib.sha1(text.encode("utf-8")).hexdigest(), self.styleName)
+        html = highlightCache.get(key)
+        if html is None:
+            lexer = getLexer(lang)                              # lexer for the specified language
+            if lexer is None:                                   # if the language is unknown, fall back to a plain code block
+                html = self.plainBlockcode(text)
+            elif self.deferHighlighting and text.count("\n") >= quarkSettings.deferred_highlighting_min_lines:
+                self.deferredBlocks += 1
+                return self.plainBlockcode(text)                # highlight later (the placeholder is not cached)
+            else:
+                start = time.perf_counter()
+                with tracer.span("highlight", lang=lang, lines=text.count("\n")):
+                    html = highlight(text, lexer, self.formatter)   # format the text
+                metrics.record("highlight", (time.perf_counter() - start) * 1000)
+            highlightCache.put(key, html)
+        return html
+
+    def plainBlockcode(self, text):
+        """Returns the HTML for a code block that is not highlighted."""
+
+        return "<div class='highlight'><pre>{}</pre></div>".format(escapeHtml(text, quote=False))
+
+    # override math rendering
+    def math(self, text, displaymode):
+        """Generates the HTML for a math expression.  The TeX source is put in a MathJax '<script>' element
+so MathJax does not have to search the document for math delimiters, and so the preview can identify
+(and cache) each expression by its source and display mode."""
+
+        mathType = "math/tex; mode=display" if displaymode else "math/tex"
+        text = text.replace("</", "< /")        # the source must not close the script element (spaces are ignored in TeX math)
+        return "<span class=\"quark-math\"><script type=\"{}\">{}</script></span>".format(mathType, text)
 
     # override html document header
     def doc_header(self, inline):
-        return self.docHeader
+        if self.standalone:
+            return self.docHeader
+        return ""
 
     # override html document footer
     def doc_footer(self, inline):
-        return self.docFooter
+        if self.standalone:
+            return self.docFooter
+        return ""
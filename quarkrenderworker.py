@@ -0,0 +1,142 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkrenderworker.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains the classes used to render notes outside of the GUI thread.
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import traceback
+
+#Qt objects
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+
+#~render task~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class RenderTaskSignals(QObject):
+    """Signals emitted by a 'RenderTask'.  'QRunnable' is not a 'QObject', so it cannot emit signals itself."""
+
+    finished = pyqtSignal(int, object)  # emitted with the revision and the result of a render
+
+
+class RenderTask(QRunnable):
+    """A task which renders a snapshot of a note in a worker thread."""
+
+    def __init__(self, renderFunction, text, revision, signals, args=()):
+        super(RenderTask, self).__init__()
+
+        self.renderFunction = renderFunction    # function called to render the note
+        self.text = text                        # snapshot of the note to render
+        self.revision = revision                # revision of the note the snapshot was taken from
+        self.signals = signals
+        self.args = args                        # extra arguments passed to the render function
+
+    def run(self):
+        try:
+            result = self.renderFunction(self.text, *self.args)
+        except Exception:
+            traceback.print_exc()   # an exception must not escape into the thread pool
+            return
+        self.signals.finished.emit(self.revision, result)
+
+
+
+class FunctionTask(QRunnable):
+    """A task which simply calls a function (with the given arguments) in a worker thread."""
+
+    def __init__(self, function, *args):
+        super(FunctionTask, self).__init__()
+
+        self.function = function
+        self.args = args
+
+    def run(self):
+        try:
+            self.function(*self.args)
+        except Exception:
+            traceback.print_exc()   # an exception must not escape into the thread pool
+
+
+
+#~render worker~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class QuarkRenderWorker(QObject):
+    """Renders notes in a worker thread.
+
+Every render request is tagged with the revision of the note it was taken from.  Requests which have
+not started yet are dropped when a newer one arrives, and a result is discarded if a newer revision
+was requested in the meantime, so only the newest completed render is ever emitted by 'rendered'.
+Renders are done one at a time, in a private thread pool with a single thread."""
+
+    rendered = pyqtSignal(int, object)  # emitted (in the GUI thread) with the revision and the result of a render
+
+    def __init__(self, renderFunction, parent=None):
+        super(QuarkRenderWorker, self).__init__(parent)
+
+        self.renderFunction = renderFunction
+        self.latestRevision = -1            # revision of the most recent request
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        # the signals object lives in the GUI thread, so results are delivered through queued connections
+        self._signals = RenderTaskSignals(self)
+        self._signals.finished.connect(self._taskFinished)
+
+
+    def requestRender(self, text, revision, *args):
+        """Schedules a render of 'text', a snapshot of the note at revision 'revision'.  Any extra arguments
+are passed on to the render function."""
+
+        self.latestRevision = revision
+        self._pool.clear()  # drop requests that have not started yet, they are already stale
+        self._pool.start( RenderTask(self.renderFunction, text, revision, self._signals, args) )
+
+
+    def shutdown(self):
+        """Drops pending requests and waits for the current render to finish."""
+
+        self._pool.clear()
+        self._pool.waitForDone()
+
+
+    def _taskFinished(self, revision, result):
+        """Slot called when a render is done.  Only emits the result if it is still the newest one."""
+
+        if revision == self.latestRevision:
+            self.rendered.emit(revision, result)
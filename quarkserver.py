@@ -0,0 +1,291 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkserver.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains the headless render server ('quark.py serve'), which serves the
+    rendered notes of the notes directory over HTTP (on a TCP port or a Unix socket).
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import os
+import sys
+import html
+import hashlib
+import argparse
+import mimetypes
+import socketserver
+import multiprocessing
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+#Quark specific
+import settings as quarkSettings
+from quarkcache import LRUCache
+from quarkrenderer import QuarkRenderer, rendererFingerprint
+from quarkmarkdown import createMarkdown
+from quarkexport import findNotes, noteExtensions
+
+
+
+#~worker process~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+_workerMarkdown = None  # the Markdown engine of a worker process
+
+
+def _initWorker():
+    """Initializes a worker process by creating its own renderer."""
+
+    global _workerMarkdown
+    _workerMarkdown = createMarkdown(QuarkRenderer(standalone=True))
+
+
+def _renderNote(text):
+    """Renders a note to a complete HTML document, encoded in UTF-8."""
+
+    return _workerMarkdown(text).encode("utf-8")
+
+
+
+#~render server~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class QuarkRenderService(object):
+    """Renders the notes of a notes directory on demand, with caching.
+
+Notes are rendered by a pool of 'processes' worker processes (one per processor if 0).  The rendered
+notes are kept in a LRU cache of 'cacheSize' notes along with the size and modification time of their
+file, so a note is only rendered again once its file changes.  Every rendered note has an ETag, a hash of
+its source and of the renderer settings, so a client holding the current version of a note does not even
+need it to be rendered again."""
+
+    def __init__(self, notesDir, processes=0, cacheSize=256):
+        self.notesDir = os.path.realpath(os.path.expanduser(notesDir))
+        self.fingerprint = rendererFingerprint()
+        self.cache = LRUCache(cacheSize)    # maps note paths to '(mtime, size, etag, html)' tuples
+
+        context = multiprocessing.get_context("spawn")
+        self._pool = context.Pool(processes if processes > 0 else (os.cpu_count() or 1), initializer=_initWorker)
+
+
+    def notePath(self, note):
+        """Returns the absolute path of the file 'note' (relative to the notes directory), or 'None' if
+it is not a file inside the notes directory."""
+
+        path = os.path.realpath( os.path.join(self.notesDir, note) )
+        if not path.startswith(self.notesDir + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+
+    def isNote(self, path):
+        """Returns True if the file at 'path' is a note, False if it is another file stored with the notes
+(e.g. an image), which is not rendered.  Markdown and plain text files (including files without an
+extension) are notes."""
+
+        if os.path.splitext(path)[1].lower() in noteExtensions:
+            return True
+        return mimetypes.guess_type(path)[0] in (None, "text/plain")
+
+
+    def read(self, path, knownEtags=()):
+        """Returns an '(etag, content type, content)' tuple for the file which is not a note at 'path'.  If
+the ETag of the file (made of its modification time and size) is one of 'knownEtags', 'content' is 'None'.
+Raises 'OSError' if the file cannot be read."""
+
+        status = os.stat(path)
+        etag = "\"{:x}-{:x}\"".format(status.st_mtime_ns, status.st_size)
+        contentType = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if etag in knownEtags:
+            return etag, contentType, None
+
+        contentFile = open(path, "rb")
+        content = contentFile.read()
+        contentFile.close()
+        return etag, contentType, content
+
+
+    def render(self, path, knownEtags=()):
+        """Returns an '(etag, html)' tuple for the note at 'path'.  If the ETag of the current version of the
+note is one of 'knownEtags', the note is not rendered and 'html' is 'None'.  Raises 'OSError' if the note
+cannot be read."""
+
+        status = os.stat(path)
+        cached = self.cache.get(path)
+        if cached is not None and cached[0] == status.st_mtime_ns and cached[1] == status.st_size:
+            return cached[2], (None if cached[2] in knownEtags else cached[3])
+
+        noteFile = open(path, "rb")
+        source = noteFile.read()
+        noteFile.close()
+
+        etag = "\"{}\"".format( hashlib.sha1(source + self.fingerprint.encode("ascii")).hexdigest() )
+        if etag in knownEtags:  # the client is up to date, rendering can wait until a client needs it
+            return etag, None
+
+        renderedHtml = self._pool.apply(_renderNote, (source.decode("utf-8", "replace"),))
+        self.cache.put(path, (status.st_mtime_ns, status.st_size, etag, renderedHtml))
+        return etag, renderedHtml
+
+
+    def index(self):
+        """Returns an HTML page listing (and linking to) all the notes."""
+
+        items = "".join("<li><a href=\"/{}\">{}</a></li>\n".format(quote(note.replace(os.sep, "/")), html.escape(note))
+                        for note in findNotes(self.notesDir) if self.isNote(note))
+        return "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Quark Notes</title></head>\n" \
+               "<body>\n<ul>\n{}</ul>\n</body></html>\n".format(items).encode("utf-8")
+
+
+    def close(self):
+        """Terminates the worker processes."""
+
+        self._pool.terminate()
+        self._pool.join()
+
+
+
+class QuarkRequestHandler(BaseHTTPRequestHandler):
+    """Handles the requests to the render server: '/' lists the notes, '/<note>' returns a rendered note and
+'/<file>' returns a file stored with the notes (e.g. an image a note links to) as it is."""
+
+    server_version = "QuarkServe"
+
+    def do_GET(self):
+        self.respond(True)
+
+    def do_HEAD(self):
+        self.respond(False)
+
+    def respond(self, sendBody):
+        """Sends the response to a GET (if 'sendBody' is True) or HEAD request."""
+
+        service = self.server.service
+        note = unquote( urlsplit(self.path).path ).lstrip("/")
+        if note == "":
+            self.sendContent(service.index(), "text/html; charset=utf-8", None, sendBody)
+            return
+
+        path = service.notePath(note)
+        if path is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        # the ETags the client has a copy of (weak ones match too, the HTML of a version never changes)
+        knownEtags = set(tag.strip().replace("W/", "", 1) for tag in self.headers.get("If-None-Match", "").split(","))
+        try:
+            if service.isNote(path):
+                contentType = "text/html; charset=utf-8"
+                etag, content = service.render(path, knownEtags)
+            else:
+                etag, contentType, content = service.read(path, knownEtags)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        if content is None:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+        else:
+            self.sendContent(content, contentType, etag, sendBody)
+
+    def sendContent(self, content, contentType, etag, sendBody):
+        """Sends the content of a page or a file, with its ETag (if it has one)."""
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", contentType)
+        self.send_header("Content-Length", str(len(content)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")   # clients must revalidate, which is cheap
+        self.end_headers()
+        if sendBody:
+            self.wfile.write(content)
+
+    def address_string(self):
+        # clients of a Unix socket have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "local"
+
+
+
+class QuarkUnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    """An HTTP server listening on a Unix socket (one thread per request)."""
+
+    daemon_threads = True
+
+
+
+#~command line~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def main(arguments):
+    parser = argparse.ArgumentParser(prog="quark.py serve", description="Serve the rendered notes over HTTP.")
+    parser.add_argument("-n", "--notes-dir", default=quarkSettings.notes_dir,
+                        help="directory of the notes to serve (default: the notes directory)")
+    parser.add_argument("--host", default=quarkSettings.server_host, help="address to listen on (default: %(default)s)")
+    parser.add_argument("-p", "--port", type=int, default=quarkSettings.server_port, help="port to listen on (default: %(default)s)")
+    parser.add_argument("-s", "--socket", help="listen on this Unix socket instead of a TCP port")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="number of render processes (default: one per processor)")
+    parser.add_argument("-c", "--cache-size", type=int, default=quarkSettings.server_cache_size,
+                        help="number of rendered notes kept in memory (default: %(default)s)")
+    options = parser.parse_args(arguments)
+
+    service = QuarkRenderService(options.notes_dir, options.jobs, options.cache_size)
+    if options.socket:
+        if os.path.exists(options.socket):
+            os.remove(options.socket)   # left over by a previous server
+        server = QuarkUnixHTTPServer(options.socket, QuarkRequestHandler)
+        print("Serving {} on {}".format(service.notesDir, options.socket))
+    else:
+        server = ThreadingHTTPServer((options.host, options.port), QuarkRequestHandler)
+        print("Serving {} on http://{}:{}/".format(service.notesDir, options.host, server.server_address[1]))
+    server.service = service
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if options.socket:
+            os.remove(options.socket)
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit( main(sys.argv[1:]) )
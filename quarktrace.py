@@ -0,0 +1,187 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarktrace.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains the tracer used to record how long each stage of a preview
+    update takes.  Traces are exported in the Chrome trace event format, which can be
+    opened in a trace viewer (e.g. chrome://tracing or https://ui.perfetto.dev).
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import os
+import json
+import time
+import threading
+from collections import deque
+
+#Quark specific
+import settings as quarkSettings
+
+
+
+#~tracer~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class _Span(object):
+    """A span being recorded, used as a context manager (see 'QuarkTracer.span()')."""
+
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = self.tracer.now()
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback):
+        self.tracer.complete(self.name, self.start, self.category, **self.args)
+        return False
+
+
+class _NoSpan(object):
+    """A span which records nothing, used while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback):
+        return False
+
+_noSpan = _NoSpan()
+
+
+class QuarkTracer(object):
+    """Records trace spans, in any thread, while enabled.
+
+Spans are recorded either with 'span()', as a context manager around the traced code, or with 'complete()',
+given the time at which the span started (e.g. for spans which start and end in different slots).  Times
+are in microseconds, as returned by 'now()'.  At most 'maxEvents' events are kept, the oldest ones are
+dropped first.  When tracing is disabled, 'span()' returns a shared object which does nothing, so traced
+code costs next to nothing."""
+
+    def __init__(self, maxEvents):
+        self.enabled = False
+        self._events = deque(maxlen=maxEvents)
+        self._threadNames = {}          # names of the threads which recorded events, by id
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+
+    def setEnabled(self, enabled):
+        """Starts or stops recording."""
+
+        self.enabled = enabled
+
+
+    def now(self):
+        """Returns the current time in microseconds."""
+
+        return time.perf_counter() * 1000000
+
+
+    def span(self, name, category="render", **args):
+        """Returns a context manager recording the time spent in its block as the span 'name'."""
+
+        if not self.enabled:
+            return _noSpan
+        return _Span(self, name, category, args)
+
+
+    def complete(self, name, start, category="render", **args):
+        """Records the span 'name' from 'start' (a time returned by 'now()') until now."""
+
+        if not self.enabled:
+            return
+        end = self.now()
+        self._record({"name": name, "cat": category, "ph": "X", "ts": start, "dur": end - start, "args": args})
+
+
+    def instant(self, name, category="render", **args):
+        """Records an event without duration."""
+
+        if self.enabled:
+            self._record({"name": name, "cat": category, "ph": "i", "s": "t", "ts": self.now(), "args": args})
+
+
+    def clear(self):
+        """Discards all the recorded events."""
+
+        with self._lock:
+            self._events.clear()
+
+
+    def eventCount(self):
+        """Returns the number of recorded events."""
+
+        return len(self._events)
+
+
+    def export(self, path):
+        """Writes the recorded events to 'path' as a Chrome trace (JSON object format)."""
+
+        with self._lock:
+            events = list(self._events)
+            threadNames = dict(self._threadNames)
+
+        metadata = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in threadNames.items()]
+        metadata.append( {"name": "process_name", "ph": "M", "pid": self._pid, "tid": 0, "args": {"name": "Quark Note Taker"}} )
+
+        traceFile = open(path, "w")
+        json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, traceFile)
+        traceFile.close()
+
+
+    def _record(self, event):
+        thread = threading.current_thread()
+        event["pid"] = self._pid
+        event["tid"] = thread.ident
+        with self._lock:
+            if thread.ident not in self._threadNames:
+                self._threadNames[thread.ident] = thread.name
+            self._events.append(event)
+
+
+
+# the tracer of the application
+tracer = QuarkTracer(int(quarkSettings.trace_max_events))
+tracer.setEnabled( bool(quarkSettings.tracing) )
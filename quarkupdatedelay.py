@@ -0,0 +1,102 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Project: Quark Note Taker
+File: quarkupdatedelay.py
+Author: Quark Note Taker contributors
+Created: October 18, 2026
+Last Modified: October 18, 2026
+
+Description:
+    This file contains the class used to compute how long to wait after an edit
+    before updating the note preview.
+
+
+Copyright (C) 2026 Quark Note Taker contributors
+
+License:
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+    THE SOFTWARE.
+"""
+
+
+
+#~import modules~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#python modules
+import time
+
+
+
+#~adaptive update delay~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class AdaptiveUpdateDelay(object):
+    """Computes the preview update delay from the measured cost of recent renders.
+
+The delay is a multiple of the moving average of recent render times plus a term proportional to the
+size of the note, bounded by 'minDelay' and 'maxDelay' (all times in milliseconds).  Small notes which
+render quickly are therefore updated almost immediately, while big notes wait long enough for renders
+not to pile up.  To keep the preview from lagging too far behind while the user types continuously,
+'isStale()' tells when the oldest edit not shown in the preview is older than 'maxStaleness'."""
+
+    renderWeight = 2.0      # the delay is (at least) this many times the average render time
+    sizeWeight = 0.5        # milliseconds added to the delay for every KiB of text in the note
+    smoothing = 0.3         # weight of the newest render time in the moving average
+
+    def __init__(self, initialDelay, minDelay, maxDelay, maxStaleness):
+        self.minDelay = minDelay
+        self.maxDelay = maxDelay
+        self.maxStaleness = maxStaleness
+        self.averageRenderTime = initialDelay / self.renderWeight    # so the first delay is 'initialDelay'
+
+        self._oldestPendingEdit = None  # time of the oldest edit not yet shown in the preview
+
+
+    def recordRenderTime(self, milliseconds):
+        """Adds the duration of a render to the moving average."""
+
+        self.averageRenderTime += self.smoothing * (milliseconds - self.averageRenderTime)
+
+
+    def delay(self, textSize):
+        """Returns the delay (in milliseconds) to wait before updating the preview of a note of 'textSize' characters."""
+
+        delay = self.renderWeight * self.averageRenderTime + self.sizeWeight * textSize / 1024.0
+        return int(min(self.maxDelay, max(self.minDelay, delay)))
+
+
+    def editMade(self):
+        """Notes that the note was edited."""
+
+        if self._oldestPendingEdit is None:
+            self._oldestPendingEdit = time.monotonic()
+
+
+    def updateStarted(self):
+        """Notes that the preview is being updated with all the edits made so far."""
+
+        self._oldestPendingEdit = None
+
+
+    def isStale(self):
+        """Returns True if the oldest edit not shown in the preview is older than 'maxStaleness'."""
+
+        if self._oldestPendingEdit is None:
+            return False
+        return (time.monotonic() - self._oldestPendingEdit) * 1000 >= self.maxStaleness
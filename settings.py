@@ -3,6 +3,42 @@ start_html_template_file= "html-template/htmlDoc_start.html"
 end_html_template_file  = "html-template/htmlDoc_end.html"
 html_template_stylesheet= "html-template/stylesheet.css"
 pygments_style          = "monokai"
+markdown_engine         = "misaka"
 notes_dir               = "~/QuarkNotes"
 theme_file              = "themes/default.css"
 update_delay            = 500
+persistent_preview      = True
+preview_script_file     = "html-template/preview.js"
+highlight_cache_size    = 512
+process_pool_rendering  = False
+render_processes        = 0
+process_pool_min_size   = 65536
+render_shared_memory_threshold = 1048576
+math_cache_size         = 2000
+lazy_math               = True
+adaptive_update_delay   = True
+update_delay_min        = 50
+update_delay_max        = 2000
+update_max_staleness    = 3000
+virtual_preview_threshold = 1048576
+virtual_preview_window  = 2000
+virtual_preview_budget  = 262144
+deferred_highlighting   = True
+deferred_highlighting_min_lines = 200
+render_cache            = True
+render_cache_dir        = "~/.cache/QuarkNotes/rendered"
+render_cache_size       = 67108864
+image_cache             = True
+image_cache_dir         = "~/.cache/QuarkNotes/images"
+image_cache_size        = 134217728
+server_host             = "127.0.0.1"
+server_port             = 8718
+server_cache_size       = 256
+tracing                 = False
+trace_max_events        = 200000
+metrics_status_bar      = False
+metrics_file            = "~/.cache/QuarkNotes/metrics.jsonl"
+metrics_interval        = 600000
+profiler_interval       = 5
+background_highlighting_threshold = 262144
+spelling_cache_size     = 20000
@@ -0,0 +1,14 @@
+"""Tests of the engine benchmark."""
+
+import pytest
+
+pytest.importorskip("misaka")
+
+import quarkbenchmark
+
+
+def test_engine_memory():
+    corpus = [quarkbenchmark.generateNote("mixed", 64 * 1024)]
+    result = quarkbenchmark.benchmarkEngine("misaka", corpus, 2)
+    assert result["best"] <= result["mean"]
+    assert result["memory"] > 0     #the rendered HTML alone is larger than a KiB
@@ -0,0 +1,77 @@
+"""Tests of the block by block rendering of the preview."""
+
+import os
+import re
+import glob
+
+import pytest
+
+pytest.importorskip("misaka")
+
+import quarkbenchmark
+from quarkblockrenderer import QuarkBlockRenderer, splitBlocks
+
+
+def test_split_paragraphs():
+    assert splitBlocks("one\ntwo\n\n\nthree\n") == [(0, "one\ntwo"), (4, "three")]
+    assert splitBlocks("") == []
+
+
+def test_split_multi_line_constructs():
+    text = "```\ncode\n\nmore code\n```\n\n$$\nx\n\ny\n$$\n\n~~~~\n```\n\n~~~~\n\nafter"
+    assert splitBlocks(text) == [(0, "```\ncode\n\nmore code\n```"), (6, "$$\nx\n\ny\n$$"),
+                                 (12, "~~~~\n```\n\n~~~~"), (17, "after")]
+
+
+def test_split_lists():
+    text = "* one\n\n* two\n\n    continued\n\nparagraph\n\n    indented code\n\n1. other list"
+    assert splitBlocks(text) == [(0, "* one\n\n* two\n\n    continued"), (6, "paragraph\n\n    indented code"),
+                                 (10, "1. other list")]
+
+
+def test_split_html_and_quotes():
+    text = "<div>\n\nhello\n\n</div>\n\n> a\n\n\n> b\n\nafter\n\n<div>\nnot closed\n\npara"
+    assert splitBlocks(text) == [(0, "<div>\n\nhello\n\n</div>"), (6, "> a\n\n\n> b"), (11, "after"),
+                                 (13, "<div>\nnot closed"), (16, "para")]
+
+
+def assertSameAsWholeNote(renderer, text):
+    #blocks are separated by different white space, which does not change the HTML
+    normalize = lambda html: re.sub(r">\s+<", "><", html).strip()
+    blocksHtml = "".join(html for block, html, provisional in renderer.renderBlocks(text))
+    assert normalize(blocksHtml) == normalize(renderer.markdown(text)), repr(text)
+
+
+@pytest.mark.parametrize("text", ["a\n\nb", "<div>\n\nhello\n\n</div>", "> a\n\n> b", "> a\n\n\n> b\n\nc",
+                                  "<DIV>\n\nhello\n</div>\n\nafter", "<div>\n<div>x</div>\n\ny\n</div>\n\npara",
+                                  "<!--\n\ncomment\n\n-->\n\n*a*", "<div>\nnot closed\n\npara", "<span>\n\nx</span>",
+                                  "* x\n\n* y\n\n    z", "```\nx\n\ny\n```\n\npara", "$$\nx\n\ny\n$$",
+                                  "| a | b |\n|---|---|\n| 1 | 2 |", "[a][x]\n\n[x]: http://example.com"])
+def test_same_as_whole_note(text):
+    assertSameAsWholeNote(QuarkBlockRenderer("misaka"), text)
+
+
+def test_same_as_whole_note_corpus():
+    renderer = QuarkBlockRenderer("misaka")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for path in glob.glob(os.path.join(root, "**", "*.md"), recursive=True):
+        with open(path, encoding="utf-8") as noteFile:
+            assertSameAsWholeNote(renderer, noteFile.read())
+    for kind in ("prose", "code", "math", "tables", "mixed"):
+        assertSameAsWholeNote(renderer, quarkbenchmark.generateNote(kind, 20000))
+
+
+def test_block_keys():
+    renderer = QuarkBlockRenderer("misaka")
+    keys = [block.key for block in renderer.renderKeyedBlocks("a\n\nb\n\na\n")]
+    assert keys[0].endswith("-0") and keys[2].endswith("-1")
+    assert keys[0][:-2] == keys[2][:-2] != keys[1][:-2]     #same content, same key (numbered to stay unique)
+
+    #editing a block only changes the key of that block
+    edited = [block.key for block in renderer.renderKeyedBlocks("a\n\nc\n\na\n")]
+    assert edited[0] == keys[0] and edited[2] == keys[2] and edited[1] != keys[1]
+
+    #link definitions apply to the whole note, so they are part of the blocks which may use them
+    linked = renderer.renderKeyedBlocks("[a][x]\n\nb\n\n[x]: http://example.com\n")
+    assert "href=\"http://example.com\"" in linked[0].html
+    assert [block.key for block in linked][1] == keys[1]
@@ -0,0 +1,59 @@
+"""Tests of the LRU cache."""
+
+import threading
+
+from quarkcache import LRUCache
+
+
+def test_least_recently_used_items_are_discarded():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1      #"b" is now the least recently used item
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert len(cache) == 2
+
+    cache.put("a", 4)               #replacing an item makes it the most recently used one
+    cache.put("d", 5)
+    assert cache.get("a") == 4 and cache.get("c") is None
+    assert cache.get("c", "default") == "default"
+
+
+def test_remove_and_clear():
+    cache = LRUCache(3)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.remove("a")
+    cache.remove("missing")
+    assert "a" not in cache and len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_stats():
+    cache = LRUCache(2)
+    assert cache.stats()["hit_rate"] == 0.0
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    cache.clear()                   #the counters are kept
+    assert cache.stats() == {"size": 0, "max_size": 2, "hits": 2, "misses": 1, "hit_rate": 2.0 / 3}
+
+
+def test_threads():
+    cache = LRUCache(50)
+
+    def use(start):
+        for i in range(start, start + 2000):
+            cache.put(i % 100, i)
+            cache.get((i + 1) % 100)
+
+    threads = [threading.Thread(target=use, args=(i * 1000,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert stats["size"] == 50 and stats["hits"] + stats["misses"] == 8000
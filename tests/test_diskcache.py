@@ -0,0 +1,24 @@
+"""Tests of the disk cache of rendered notes."""
+
+import pytest
+
+pytest.importorskip("misaka")
+
+from quarkblockrenderer import KeyedBlock
+from quarkdiskcache import QuarkDiskCache
+
+
+def test_store_and_load(tmp_path):
+    cache = QuarkDiskCache(str(tmp_path), 1024 * 1024)
+    blocks = [KeyedBlock("k-0", "<p>café π</p>\n", 0, 1, False)]
+    cache.store("note.md", "café π", blocks)
+    assert cache.load("note.md", "café π") == blocks
+    assert cache.load("note.md", "other text") is None
+
+
+def test_rejected_entries(tmp_path):
+    cache = QuarkDiskCache(str(tmp_path), 1024 * 1024)
+    for content in ("not json", "[[1, 2]]", "\xff\xfe"):
+        with open(cache.entryPath("note.md", content), "w", encoding="latin-1") as entryFile:
+            entryFile.write(content)
+        assert cache.load("note.md", content) is None
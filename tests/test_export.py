@@ -0,0 +1,46 @@
+"""Tests of the export of the notes to HTML files."""
+
+import os
+import json
+
+import pytest
+
+pytest.importorskip("misaka")
+
+import quarkexport
+
+
+def writeNote(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as noteFile:
+        noteFile.write(text)
+
+
+def test_export_skips_unchanged_notes(tmp_path):
+    notesDir = str(tmp_path / "notes")
+    outputDir = str(tmp_path / "html")
+    writeNote(os.path.join(notesDir, "a.md"), "# Café\n\n∑ of *things*\n")
+    writeNote(os.path.join(notesDir, "book", "b.md"), "Some `code`\n")
+    with open(os.path.join(notesDir, "book", "image.png"), "wb") as imageFile:
+        imageFile.write(b"\x89PNG\r\n\x1a\n\xff\xfe")   #not a note
+
+    assert quarkexport.exportNotes(notesDir, outputDir, processes=1) == (2, 0, 0)
+    with open(os.path.join(outputDir, "a.html"), encoding="utf-8") as htmlFile:
+        assert "Café" in htmlFile.read()
+    with open(os.path.join(outputDir, quarkexport.manifestName), encoding="utf-8") as manifestFile:
+        assert sorted(json.load(manifestFile)["notes"]) == ["a.md", "book/b.md", "book/image.png"]
+    assert not os.path.exists(os.path.join(outputDir, "book", "image.png.html"))
+
+    #nothing changed, then only the modification time changed
+    assert quarkexport.exportNotes(notesDir, outputDir, processes=1) == (0, 2, 0)
+    os.utime(os.path.join(notesDir, "a.md"), (1, 1))
+    assert quarkexport.exportNotes(notesDir, outputDir, processes=1) == (0, 2, 0)
+
+    #the content changed, then the note was removed
+    writeNote(os.path.join(notesDir, "book", "b.md"), "Other `code`\n")
+    assert quarkexport.exportNotes(notesDir, outputDir, processes=1) == (1, 1, 0)
+    os.remove(os.path.join(notesDir, "a.md"))
+    assert quarkexport.exportNotes(notesDir, outputDir, processes=1) == (0, 1, 0)
+    assert not os.path.exists(os.path.join(outputDir, "a.html"))
+
+    assert quarkexport.exportNotes(notesDir, outputDir, processes=1, force=True) == (1, 0, 0)
@@ -0,0 +1,266 @@
+"""Tests of the Markdown tokenizer of the note editor highlighter."""
+
+import os
+import glob
+import random
+
+import pytest
+
+pytest.importorskip("PyQt5.QtGui")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtGui import QGuiApplication, QTextCharFormat, QTextCursor, QTextDocument
+
+import settings
+import quarkbenchmark
+
+from highlighter import Highlighter, SpellChecker, blockToken, itemToken, spanToken
+
+
+@pytest.fixture(scope="module", autouse=True)
+def application():
+    yield QGuiApplication.instance() or QGuiApplication([])     #kept alive while the tests run
+
+
+@pytest.fixture(scope="module")
+def highlighter():
+    document = QTextDocument()
+    yield Highlighter(document)
+
+
+def oldHighlighting(highlighter, text, previousState):
+    """The rule by rule scan of the highlighter before the tokenizer.  Returns the formats it sets (as
+tokens), the token kind of every character of 'text' ('None' if not highlighted) and the block-state of
+the line."""
+
+    tokens = []
+    kinds = [None] * len(text)
+    state = None
+
+    def setFormat(start, count, kind):
+        tokens.append( (start, count, kind) )
+        for i in range(start, min(start + count, len(text))):
+            kinds[i] = kind
+
+    defaultOffset = 0
+    if previousState > 0:
+        rule = list(highlighter.blockRules.values())[previousState - 1]
+        ruleMatch = rule[1].match(text)
+        if not ruleMatch.hasMatch():
+            setFormat(0, len(text), blockToken)
+            return tokens, kinds, previousState
+        state = 0
+        setFormat(0, ruleMatch.capturedEnd(), blockToken)
+        defaultOffset = ruleMatch.capturedLength()
+
+    counter = 1
+    for rule in highlighter.blockRules.values():
+        ruleMatch = rule[0].match(text, defaultOffset)
+        if not ruleMatch.hasMatch():
+            counter += 1
+            continue
+        endMatch = rule[1].match(text, defaultOffset + ruleMatch.capturedLength())
+        start = ruleMatch.capturedStart()
+        if endMatch.hasMatch():
+            setFormat(start, endMatch.capturedEnd() - start, blockToken)
+            defaultOffset = endMatch.capturedEnd()
+            counter += 1
+            continue
+        setFormat(start, len(text) - start, blockToken)
+        return tokens, kinds, counter
+
+    for rules, kind in ((highlighter.itemRules, itemToken), (highlighter.spanRules, spanToken)):
+        for rule in rules.values():
+            ruleMatch = rule.match(text, defaultOffset)
+            while ruleMatch.hasMatch():
+                setFormat(ruleMatch.capturedStart(), ruleMatch.capturedLength(), kind)
+                ruleMatch = rule.match(text, ruleMatch.capturedEnd() + 1)
+
+    return tokens, kinds, state
+
+
+def newHighlighting(highlighter, text, previousState):
+    kinds = [None] * len(text)
+    tokens, state = highlighter.tokenizer.tokenize(text, previousState)
+    for start, length, kind in tokens:
+        for i in range(start, min(start + length, len(text))):
+            kinds[i] = kind
+    return tokens, kinds, state
+
+
+def assertSameHighlighting(highlighter, lines):
+    oldState = newState = -1
+    for line in lines:
+        oldTokens, oldKinds, oldState = oldHighlighting(highlighter, line, oldState)
+        newTokens, newKinds, newState = newHighlighting(highlighter, line, newState)
+        #the same formats are set, token for token (empty ones change nothing), and in an order giving the
+        #same precedence: blocks, then items, then spans
+        assert sorted(t for t in newTokens if t[1] > 0) == sorted(t for t in oldTokens if t[1] > 0), repr(line)
+        assert [t[2] for t in newTokens] == sorted(t[2] for t in newTokens), repr(line)
+        assert (newKinds, newState) == (oldKinds, oldState), repr(line)
+        oldState = -1 if oldState is None else oldState
+        newState = -1 if newState is None else newState
+
+
+def test_overlapping_spans(highlighter):
+    assertSameHighlighting(highlighter, ["price is $5 and `$x` here $y$", "text *a `b* c`", "* *item* [link](x)",
+                                         "[TOC]: http://example.com", "  [x]: y *z* [TOC]", "---", "# *a* $b$"])
+
+
+def test_mixed_markup(highlighter):
+    for kind in ("prose", "code", "math", "tables", "mixed"):
+        assertSameHighlighting(highlighter, quarkbenchmark.generateNote(kind, 100000).split("\n"))
+
+
+def test_multi_line_spans(highlighter):
+    assertSameHighlighting(highlighter, ["```python", "x = *1*", "```", "> quote `a`", "still quoted", "",
+                                         "$$x$$ and $$", "y", "$$ after"])
+
+
+def test_documentation(highlighter):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for path in glob.glob(os.path.join(root, "**", "*.md"), recursive=True):
+        with open(path, encoding="utf-8") as noteFile:
+            assertSameHighlighting(highlighter, noteFile.read().split("\n"))
+
+
+def test_random_lines(highlighter):
+    atoms = ["*", "**", "_", "__", "`", "``", "$", "$$", "[", "]", "(", ")", " ", "a", "word", "#", "-",
+             ">", "[TOC]", "!", ":", "\"", "'", "=", "```"]
+    generator = random.Random(0)
+    lines = ["".join(generator.choice(atoms) for i in range(generator.randint(0, 14))) for j in range(20000)]
+    assertSameHighlighting(highlighter, lines)
+
+
+def blockFormats(document):
+    formats = []
+    block = document.begin()
+    while block.isValid():
+        formats.append( (block.text(), block.userState(),
+                         [(r.start, r.length, r.format.foreground().color().name()) for r in block.layout().formats()]) )
+        block = block.next()
+    return formats
+
+
+def highlightedDocument():
+    document = QTextDocument()
+    document.documentLayout()               #edits are only signaled (and highlighted) once the document is laid out
+    highlighter = Highlighter(document)
+    QGuiApplication.instance().processEvents()  #the highlighter starts with a delayed highlighting of the document
+    return document, highlighter
+
+
+def test_background_highlighting():
+    app = QGuiApplication.instance()
+    text = "\n".join(["# title", "```", "code *a*", "```", "text *a* `b`", "", "> quote", "more"] * 50)
+
+    document, backgroundHighlighter = highlightedDocument()
+    backgroundHighlighter.highlightInBackground(text)
+    document.setPlainText(text)
+    backgroundHighlighter.noteLoaded()
+    assert all(not formats for line, state, formats in blockFormats(document))
+
+    #a line inserted while the note is tokenized is highlighted right away, and moves the other lines
+    cursor = QTextCursor(document)
+    cursor.insertText("`inserted` line\n")
+    assert blockFormats(document)[0][2]
+    applied = []
+    applyPrecomputed = backgroundHighlighter.applyPrecomputed
+    backgroundHighlighter.applyPrecomputed = lambda line: applied.append(applyPrecomputed(line)) or applied[-1]
+    while backgroundHighlighter._suspended:
+        app.processEvents()
+    assert applied.count(False) == 1        #only the inserted line is tokenized again
+
+    expected, expectedHighlighter = highlightedDocument()
+    expected.setPlainText("`inserted` line\n" + text)
+    assert blockFormats(document) == blockFormats(expected)
+
+
+class FakeDictionary(object):
+    def __init__(self, words):
+        self.words = set(words)
+        self.checks = 0
+
+    def check(self, word):
+        self.checks += 1
+        return word.lower() in self.words
+
+    def add(self, word):
+        self.words.add(word.lower())
+
+    def remove(self, word):
+        self.words.discard(word.lower())
+
+
+def test_spell_checker_cache():
+    dictionary = FakeDictionary(["word"])
+    spellChecker = SpellChecker(dictionary, 10)
+    assert spellChecker.cached("Word") is None
+    assert spellChecker.check("Word") and spellChecker.check("Word")
+    assert not spellChecker.check("wurd")
+    assert dictionary.checks == 2
+    assert spellChecker.cached("wurd") is False
+
+    spellChecker.add("Wurd")                #every capitalization of an added word is looked up again
+    assert spellChecker.cached("wurd") is None
+    assert spellChecker.check("wurd")
+    spellChecker.remove("wurd")
+    assert not spellChecker.check("Wurd")
+    assert spellChecker.stats()["hits"] == 2
+
+
+def misspelledWords(block):
+    return [block.text()[r.start:r.start + r.length] for r in block.layout().formats()
+            if r.format.underlineStyle() == QTextCharFormat.SpellCheckUnderline]
+
+
+def waitForSpellCheck(highlighter):
+    app = QGuiApplication.instance()
+    for i in range(1000):
+        app.processEvents()
+        if not highlighter._waitingBlocks and not highlighter._uncheckedWords:
+            return i
+        highlighter.spellCheckPool.waitForDone()
+    raise AssertionError("the words are checked again and again")
+
+
+def test_background_spell_check(monkeypatch):
+    monkeypatch.setattr(settings, "spelling_cache_size", 4)
+    document, highlighter = highlightedDocument()
+    highlighter.setDictionary( FakeDictionary(["word", "more"]) )
+    words = ["word", "more", "wurd", "alpha", "beta", "gamma", "delta", "wurd"]
+    document.setPlainText( " ".join(words) + "\nword wurd" )
+    assert misspelledWords(document.begin()) == []  #the words are checked in the background
+    cursor = QTextCursor(document)
+    cursor.insertText("inserted\n")                 #the blocks move while their words are checked
+
+    waitForSpellCheck(highlighter)                  #more words than the cache can hold in the first block
+    assert misspelledWords(document.begin()) == ["inserted"]
+    assert misspelledWords(document.begin().next()) == ["wurd", "alpha", "beta", "gamma", "delta", "wurd"]
+    assert misspelledWords(document.lastBlock()) == ["wurd"]
+
+
+def test_dictionary_change_while_tokenizing():
+    app = QGuiApplication.instance()
+    text = "\n".join(["# title", "wurd *word*"] * 50)
+    document, highlighter = highlightedDocument()
+    highlighter.highlightInBackground(text)
+    document.setPlainText(text)
+    highlighter.noteLoaded()
+
+    #the note is only highlighted once its tokens are ready, with the new dictionary
+    highlighted = []
+    highlightBlock = highlighter.highlightBlock
+    highlighter.highlightBlock = lambda line: highlighted.append(line) or highlightBlock(line)
+    highlighter.setDictionary( FakeDictionary(["title", "word"]) )
+    assert highlighted == []
+    while highlighter._suspended:
+        app.processEvents()
+    assert len(highlighted) == document.blockCount()
+    assert misspelledWords(document.begin().next()) == ["wurd"]
+
+    #otherwise it is highlighted again right away
+    del highlighted[:]
+    highlighter.setDictionary(None)
+    assert len(highlighted) == document.blockCount()
+    assert misspelledWords(document.begin().next()) == []
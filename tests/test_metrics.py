@@ -0,0 +1,73 @@
+"""Tests of the latency histograms and of the metrics file."""
+
+import json
+
+import pytest
+
+from quarkmetrics import LatencyHistogram, QuarkMetrics, bucketBounds
+
+
+def test_percentiles_are_bucket_bounds():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    for milliseconds in range(1, 101):
+        histogram.record(milliseconds)
+
+    for p in (1, 50, 90, 99):
+        exact = float(p)
+        value = histogram.percentile(p)
+        assert exact <= value <= exact * 1.25       #an upper bound, accurate to a bucket
+        assert value in bucketBounds or value == histogram.maximum
+    assert histogram.percentile(100) == 100         #never more than the biggest value
+    assert histogram.summary()["mean"] == pytest.approx(50.5)
+    assert sum(histogram.summary()["buckets"].values()) == 100
+
+
+def test_values_out_of_the_buckets():
+    histogram = LatencyHistogram()
+    histogram.record(0)
+    histogram.record(10 ** 6)
+    assert histogram.percentile(50) == bucketBounds[0]
+    assert histogram.percentile(99) == 10 ** 6
+    assert histogram.summary()["buckets"] == {"0.05": 1, "inf": 1}
+
+
+def test_merge():
+    first = LatencyHistogram()
+    second = LatencyHistogram()
+    for i in range(90):
+        first.record(1)
+    for i in range(10):
+        second.record(1000)
+    first.merge(second)
+    assert first.count == 100 and first.maximum == 1000
+    assert first.percentile(90) <= 1.25 and first.percentile(91) >= 1000 / 1.25
+
+
+def test_rolling_intervals():
+    metrics = QuarkMetrics()
+    assert metrics.percentiles("render") == [None, None]
+    metrics.record("render", 10)
+    interval = metrics.roll()
+    assert interval["metrics"]["render"]["count"] == 1
+    metrics.record("render", 1000)
+    assert metrics.percentiles("render", (50, 100)) == [pytest.approx(10, rel=0.25), 1000]
+
+    metrics.roll()
+    assert metrics.roll() is None                   #nothing recorded during the interval
+    assert metrics.percentiles("render") == [None, None]
+
+
+def test_dump(tmp_path):
+    path = str(tmp_path / "metrics" / "metrics.jsonl")
+    metrics = QuarkMetrics()
+    metrics.dump(path)                              #nothing to write
+    metrics.record("save", 5)
+    metrics.dump(path)
+    metrics.record("save", 6)
+    metrics.dump(path)
+    with open(path) as metricsFile:
+        lines = [json.loads(line) for line in metricsFile]
+    assert len(lines) == 2
+    assert lines[1]["metrics"]["save"]["max"] == 6
+    assert "host" in lines[0] and "build" in lines[0]
@@ -0,0 +1,21 @@
+"""Tests of the Markdown renderer and of its highlighting caches."""
+
+import pytest
+
+pytest.importorskip("misaka")
+
+import quarkrenderer
+
+
+def test_lexer_cache_is_bounded():
+    quarkrenderer._lexerCache.clear()
+    python = quarkrenderer.getLexer("python")
+    assert python is not None and quarkrenderer.getLexer("python") is python
+    assert quarkrenderer.getLexer("no-such-language") is None
+
+    #languages come from the notes, known or not, so the cache must not grow with them
+    for i in range(1000):
+        assert quarkrenderer.getLexer("no-such-language-{}".format(i)) is None
+    assert len(quarkrenderer._lexerCache) == quarkrenderer._lexerCache.maxSize
+    assert "python" not in quarkrenderer._lexerCache
+    assert quarkrenderer.getLexer("python").name == python.name
@@ -0,0 +1,82 @@
+"""Tests of the render server."""
+
+import os
+import threading
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("misaka")
+
+from quarkserver import QuarkRenderService, QuarkRequestHandler
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    root = tmp_path_factory.mktemp("server")
+    notesDir = root / "notes"
+    (notesDir / "book").mkdir(parents=True)
+    (notesDir / "book" / "note.md").write_text("# Title\n\n*text*\n", encoding="utf-8")
+    (notesDir / "book" / "image.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+    (notesDir / "plain").write_text("plain note\n", encoding="utf-8")
+    (root / "secret.md").write_text("secret\n", encoding="utf-8")
+    os.symlink(str(root / "secret.md"), str(notesDir / "link.md"))
+
+    service = QuarkRenderService(str(notesDir), processes=1)
+    httpServer = ThreadingHTTPServer(("127.0.0.1", 0), QuarkRequestHandler)
+    httpServer.service = service
+    thread = threading.Thread(target=httpServer.serve_forever, daemon=True)
+    thread.start()
+    yield httpServer
+    httpServer.shutdown()
+    httpServer.server_close()
+    service.close()
+
+
+def get(server, path, headers={}):
+    connection = HTTPConnection(*server.server_address)
+    connection.request("GET", path, headers=headers)
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_note_etag(server):
+    response, body = get(server, "/book/note.md")
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "text/html; charset=utf-8"
+    assert b"<em>text</em>" in body
+    etag = response.getheader("ETag")
+
+    response, body = get(server, "/book/note.md", {"If-None-Match": etag})
+    assert response.status == 304 and body == b""
+    response, body = get(server, "/book/note.md", {"If-None-Match": "W/" + etag})
+    assert response.status == 304
+    response, body = get(server, "/book/note.md", {"If-None-Match": "\"other\""})
+    assert response.status == 200 and response.getheader("ETag") == etag
+
+
+def test_other_files(server):
+    response, body = get(server, "/book/image.png")
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "image/png"
+    assert body == b"\x89PNG\r\n\x1a\n"
+    response, body = get(server, "/book/image.png", {"If-None-Match": response.getheader("ETag")})
+    assert response.status == 304
+
+    response, body = get(server, "/plain")     #files without an extension are notes
+    assert response.getheader("Content-Type") == "text/html; charset=utf-8"
+    assert b"plain note" in body
+
+    response, body = get(server, "/")
+    assert b"book/note.md" in body and b"image.png" not in body
+
+
+@pytest.mark.parametrize("path", ["/../secret.md", "/book/../../secret.md", "/%2e%2e/secret.md",
+                                  "/%2E%2E%2Fsecret.md", "/link.md", "/missing.md", "/book"])
+def test_path_traversal(server, path):
+    response, body = get(server, path)
+    assert response.status == 404
+    assert b"secret" not in body
@@ -0,0 +1,47 @@
+"""Tests of the adaptive delay of the preview updates."""
+
+import pytest
+
+import quarkupdatedelay
+from quarkupdatedelay import AdaptiveUpdateDelay
+
+
+def test_delay_follows_render_times():
+    updateDelay = AdaptiveUpdateDelay(initialDelay=100, minDelay=20, maxDelay=1000, maxStaleness=2000)
+    assert updateDelay.delay(0) == 100
+    assert updateDelay.delay(1024 * 100) == 150     #half a millisecond per KiB of text
+
+    for i in range(50):                             #fast renders
+        updateDelay.recordRenderTime(1)
+    assert updateDelay.delay(0) == 20
+    for i in range(50):                             #slow renders
+        updateDelay.recordRenderTime(300)
+    assert 590 <= updateDelay.delay(0) <= 600
+    assert updateDelay.delay(1024 * 10000) == 1000
+
+
+def test_moving_average():
+    updateDelay = AdaptiveUpdateDelay(initialDelay=20, minDelay=20, maxDelay=1000, maxStaleness=2000)
+    assert updateDelay.averageRenderTime == 10
+    updateDelay.recordRenderTime(100)
+    assert updateDelay.averageRenderTime == pytest.approx(37)
+    assert updateDelay.delay(0) == 74
+
+
+def test_staleness(monkeypatch):
+    now = [10.0]
+    monkeypatch.setattr(quarkupdatedelay.time, "monotonic", lambda: now[0])
+    updateDelay = AdaptiveUpdateDelay(initialDelay=100, minDelay=20, maxDelay=1000, maxStaleness=500)
+    assert not updateDelay.isStale()
+
+    updateDelay.editMade()
+    now[0] += 0.4
+    updateDelay.editMade()                          #only the oldest edit counts
+    assert not updateDelay.isStale()
+    now[0] += 0.1
+    assert updateDelay.isStale()
+
+    updateDelay.updateStarted()
+    assert not updateDelay.isStale()
+    now[0] += 1
+    assert not updateDelay.isStale()
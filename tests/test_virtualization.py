@@ -0,0 +1,90 @@
+"""Tests of the virtualized preview of long notes and of the patches sent to the preview."""
+
+import random
+
+import pytest
+
+pytest.importorskip("misaka")
+
+from quarkblockrenderer import QuarkBlockRenderer, KeyedBlock, diffBlocks
+
+
+def test_block_lines_and_window():
+    renderer = QuarkBlockRenderer("misaka")
+    text = "\n\n".join("paragraph {}".format(i) for i in range(100))
+    blocks = renderer.renderKeyedBlocks(text, window=(40, 44))
+    #the blocks before and after the window are merged into one placeholder each
+    assert [(block.firstLine, block.lineCount) for block in blocks] == [(0, 39), (40, 1), (42, 1), (44, 1), (46, 153)]
+    assert ["quark-placeholder" in block.html for block in blocks] == [True, False, False, False, True]
+    assert "height: {}em".format(20 * 3.0) in blocks[0].html
+    assert "paragraph 21" in blocks[2].html
+    assert not any(block.pending for block in blocks)
+
+    #the cache only keeps the blocks near the window as it moves through the note
+    for first in range(0, 200, 10):
+        renderer.renderKeyedBlocks(text, window=(first, first + 4))
+    assert len(renderer._cache) <= 10
+
+
+def test_budget():
+    renderer = QuarkBlockRenderer("misaka")
+    text = "\n\n".join("paragraph {}".format(i) for i in range(10))
+    blocks = renderer.renderKeyedBlocks(text, window=(0, 18), budget=1)
+    assert [i for i, block in enumerate(blocks) if not block.pending] == [4]   #the block closest to the middle of the window
+    assert "paragraph 4" in blocks[4].html
+    blocks = renderer.renderKeyedBlocks(text, window=(0, 18), budget=1)
+    assert [i for i, block in enumerate(blocks) if not block.pending] == [4, 5]
+
+
+def test_bounded_blocks():
+    renderer = QuarkBlockRenderer("misaka")
+    text = "\n\n".join("paragraph {}".format(i) for i in range(20000))
+    blocks = renderer.renderKeyedBlocks(text, window=(1000, 1100))
+    assert len(blocks) == 51 + 2
+    assert sum(block.lineCount for block in blocks) + len(blocks) - 1 == text.count("\n") + 1
+    assert len(set(block.key for block in blocks)) == len(blocks)
+
+    #moving the window only changes the blocks around it
+    oldBlocks = blocks
+    blocks = renderer.renderKeyedBlocks(text, window=(1010, 1110))
+    removed, inserted, moved = diffBlocks(oldBlocks, blocks)
+    assert len(removed) == 5 + 2 and len(inserted) == 5 + 2 and moved == {}
+
+
+def applyPatch(keys, patch):
+    """Applies a patch returned by 'diffBlocks()' to the list of keys 'keys', as the preview script does."""
+
+    removed, inserted, moved = patch
+    keys = [key for key in keys if key not in removed]
+    for previousKey, key, html in inserted:
+        keys.insert(0 if previousKey is None else keys.index(previousKey) + 1, key)
+    return keys
+
+
+def longestCommonSequence(first, second):
+    """Returns the length of the longest sequence of items found in the same order in both lists."""
+
+    lengths = [[0] * (len(second) + 1) for i in range(len(first) + 1)]
+    for i, a in enumerate(first):
+        for j, b in enumerate(second):
+            lengths[i + 1][j + 1] = lengths[i][j] + 1 if a == b else max(lengths[i][j + 1], lengths[i + 1][j])
+    return lengths[-1][-1]
+
+
+def test_diff_blocks():
+    makeBlocks = lambda keys: [KeyedBlock(key, "<p>{}</p>".format(key), i, 1, False) for i, key in enumerate(keys)]
+    oldBlocks = makeBlocks("abcdef")
+
+    #a block moved to the start is the only one sent again
+    removed, inserted, moved = diffBlocks(oldBlocks, makeBlocks("fabcde"))
+    assert removed == ["f"]
+    assert inserted == [(None, "f", "<p>f</p>")]
+    assert moved == dict( (key, (i + 1, 1)) for i, key in enumerate("abcde") )
+
+    random.seed(3)
+    for attempt in range(200):
+        keys = random.sample("abcdefghijklmnop", random.randint(0, 16))
+        newKeys = random.sample("abcdefghijklmnop", random.randint(0, 16))
+        patch = diffBlocks(makeBlocks(keys), makeBlocks(newKeys))
+        assert applyPatch(keys, patch) == newKeys
+        assert len(patch[1]) == len(newKeys) - longestCommonSequence(keys, newKeys)